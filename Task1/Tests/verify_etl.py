@@ -0,0 +1,153 @@
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from etl_script import (RECORD, bulk_load_to_db, create_summary_table, export_parquet, iter_custom_format,
+                        load_shards, load_to_db, parse_custom_format)
+
+DATA_PATH = Path(__file__).resolve().parent.parent / "task1_d.json"
+
+# Strings with braces, quotes and "=>" inside must not end or split a record.
+TRICKY = [
+    '{:id=>1, :title=>"Curly {braces} and \\"quotes\\"", :author=>"A, B", :genre=>"x=>y", '
+    ':publisher=>"}{", :year=>1999, :price=>"$12,50"}',
+    '{:id=>2, :title=>"", :author=>"C", :genre=>"Humor", :publisher=>"P", :year=>1999, :price=>"€7"}',
+]
+
+
+def write_dump(path, records):
+    path.write_text("[" + ",\n ".join(records) + "]", encoding="utf-8")
+    return path
+
+
+def rows(conn, query):
+    return conn.execute(query).fetchall()
+
+
+def summaries(conn):
+    # (incremental, full) summary tables of the same database.
+    create_summary_table(conn, incremental=True)
+    incremental = rows(conn, "SELECT * FROM summary ORDER BY publication_year")
+    create_summary_table(conn)
+    return incremental, rows(conn, "SELECT * FROM summary ORDER BY publication_year")
+
+
+def read_dataset(path):
+    # The year=... directories come back as a column like the rest.
+    return ds.dataset(path, format="parquet", partitioning="hive").to_table()
+
+
+def main():
+    raw = DATA_PATH.read_text(encoding="utf-8")
+    records = [m.group() for m in RECORD.finditer(raw)]
+    books = parse_custom_format(DATA_PATH)
+    assert len(records) == len(books), (len(records), len(books))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        print("--- STREAMING TOKENIZER vs json.loads OF THE WHOLE DUMP ---")
+        small = write_dump(tmp / "small.json", TRICKY + records[:200])
+        for chunk_size in [1, 2, 3, 7, 64]:
+            assert list(iter_custom_format(small, chunk_size)) == parse_custom_format(small), chunk_size
+        for chunk_size in [4096, 1 << 20]:
+            assert list(iter_custom_format(DATA_PATH, chunk_size)) == books, chunk_size
+        truncated = write_dump(tmp / "truncated.json", records[:3])
+        truncated.write_text(truncated.read_text(encoding="utf-8")[:-20], encoding="utf-8")
+        try:
+            list(iter_custom_format(truncated, 16))
+            raise AssertionError("truncated dump parsed without error")
+        except ValueError:
+            pass
+        print("Same records at every chunk size; truncated dumps raise.")
+
+        print("--- BULK LOADER vs ROW-BY-ROW LOADER ---")
+        row_conn = load_to_db(books, str(tmp / "rows.db"))
+        bulk_conn = bulk_load_to_db(books, str(tmp / "bulk.db"), batch_size=777)
+        books_query = "SELECT * FROM books ORDER BY id"
+        assert rows(row_conn, books_query) == rows(bulk_conn, books_query)
+        assert summaries(row_conn)[1] == summaries(bulk_conn)[1]
+        row_conn.close()
+
+        shards = [write_dump(tmp / f"shard{i}.json", records[i::3]) for i in range(3)]
+        shard_conn = load_shards([str(p) for p in shards], str(tmp / "shards.db"), workers=2,
+                                 batch_size=500, queue_size=1)
+        assert rows(shard_conn, books_query) == rows(bulk_conn, books_query)
+        shard_conn.close()
+        bulk_conn.close()
+
+        bad = write_dump(tmp / "bad.json", records[:50])
+        bad.write_text(bad.read_text(encoding="utf-8")[:-30], encoding="utf-8")
+        try:
+            load_shards([str(p) for p in shards] + [str(bad)], str(tmp / "bad.db"), workers=2,
+                        batch_size=10, queue_size=1)
+            raise AssertionError("a truncated shard loaded without error")
+        except RuntimeError as e:
+            assert "bad.json" in str(e), e
+        print("Row-by-row, bulk and sharded loads give identical tables; a bad shard fails fast.")
+
+        print("--- PARQUET EXPORT vs books.db ---")
+        out = tmp / "parquet"
+        export_parquet(str(tmp / "rows.db"), out, batch_size=1000)
+        source = sqlite3.connect(str(tmp / "rows.db"))
+        exported = read_dataset(out / "books")
+        assert exported.schema.field("id").type == pa.uint64()
+        assert sorted(exported.column("id").to_pylist()) == sorted(int(i) for i, in rows(source, "SELECT id FROM books"))
+        years = {year for year, in rows(source, "SELECT DISTINCT year FROM books")}
+        assert {p.name for p in (out / "books").iterdir()} == {f"year={year}" for year in years}
+        summary = read_dataset(out / "summary").sort_by("publication_year")
+        assert [tuple(row.values()) for row in summary.select(["publication_year", "book_count", "average_price"])
+                .to_pylist()] == rows(source, "SELECT * FROM summary ORDER BY publication_year")
+        source.close()
+        print("Exported ids, year partitions and summary match the database.")
+
+        print("--- TRIGGER-MAINTAINED SUMMARY vs FULL REBUILD ---")
+        db = str(tmp / "incremental.db")
+        cut = len(books) * 3 // 5
+        # Overlapping loads: the second repeats the last 20% of the first.
+        conn = bulk_load_to_db(books[:cut], db, incremental_summary=True)
+        conn.close()
+        conn = bulk_load_to_db(books[len(books) * 2 // 5:], db, incremental_summary=True)
+        incremental, full = summaries(conn)
+        assert incremental == full
+        assert sum(count for _, count, _ in full) == len(books)
+
+        conn.execute("DELETE FROM books WHERE year % 3 = 0 OR id LIKE '%7'")
+        conn.commit()
+        incremental, full = summaries(conn)
+        assert incremental == full
+
+        # Reloading everything puts the deleted rows back and nothing else.
+        conn.close()
+        conn = bulk_load_to_db(books, db, incremental_summary=True)
+        incremental, full = summaries(conn)
+        assert incremental == full
+        assert sum(count for _, count, _ in full) == len(books)
+
+        # A different EUR factor re-prices the stored rows and the totals.
+        conn.close()
+        conn = bulk_load_to_db([], db, incremental_summary=True, eur_to_usd=1.1)
+        incremental, full = summaries(conn)
+        assert incremental == full
+        fresh = bulk_load_to_db(books, str(tmp / "fresh.db"), eur_to_usd=1.1)
+        assert rows(conn, books_query) == rows(fresh, books_query)
+        conn.close()
+        fresh.close()
+        print("Incremental summary matches the full rebuild after overlapping loads, deletes and re-pricing.")
+
+    # The committed books.db still holds the summary the original script built.
+    committed = sqlite3.connect(f"file:{DATA_PATH.parent / 'books.db'}?mode=ro", uri=True)
+    expected = rows(committed, "SELECT * FROM summary ORDER BY publication_year")
+    committed.close()
+    conn = load_to_db(books, ":memory:")
+    assert summaries(conn) == (expected, expected)
+    print("Summary matches the committed books.db.")
+
+
+if __name__ == "__main__":
+    main()
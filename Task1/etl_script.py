@@ -1,87 +1,477 @@
+import os
 import re
+import glob
 import json
+import time
 import sqlite3
+import argparse
+from pathlib import Path
+from queue import Empty
+from itertools import islice
+from multiprocessing import Manager
+from concurrent.futures import ProcessPoolExecutor
+
+
+EUR_TO_USD = float(os.environ.get("EUR_TO_USD", "1.2"))
+
+RUBY_KEY = re.compile(r':(\w+)=>')
+RECORD = re.compile(r'\{(?:[^{}"]++|"(?:[^"\\]++|\\.)*+")*+\}')
 
 
 def parse_custom_format(filename):
     with open(filename, 'r', encoding='utf-8') as f:
         raw_data = f.read()
 
-    json_friendly_data = re.sub(r':(\w+)=>', r'"\1":', raw_data)
+    json_friendly_data = RUBY_KEY.sub(r'"\1":', raw_data)
 
     return json.loads(json_friendly_data)
 
 
-def load_to_db(data, db_name="books.db"):
-    conn = sqlite3.connect(db_name)
+def iter_custom_format(filename, chunk_size=1 << 20):
+    # Streams one {:key=>value, ...} record at a time, so memory is bounded by
+    # chunk_size plus the largest record instead of the size of the whole dump.
+    with open(filename, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        while True:
+            start = buffer.find('{', pos)
+            match = RECORD.match(buffer, start) if start != -1 else None
+
+            if match:
+                yield json.loads(RUBY_KEY.sub(r'"\1":', match.group()))
+                pos = match.end()
+                continue
+
+            if eof:
+                leftover = buffer[pos:].strip(' \t\r\n,[]')
+                if leftover:
+                    raise ValueError(f"Truncated record in {filename}: {leftover[:80]!r}")
+                return
+
+            buffer = buffer[start if start != -1 else len(buffer):]
+            pos = 0
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+
+
+CREATE_BOOKS_SQL = '''
+    CREATE TABLE IF NOT EXISTS books (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        author TEXT,
+        genre TEXT,
+        publisher TEXT,
+        year INTEGER,
+        price TEXT,
+        price_usd REAL,
+        currency TEXT
+    )
+'''
+
+INSERT_BOOK_SQL = '''
+    INSERT OR IGNORE INTO books (id, title, author, genre, publisher, year, price, price_usd, currency)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+BOOK_INDEXES = {
+    "idx_books_year_price": "CREATE INDEX IF NOT EXISTS idx_books_year_price ON books (year, price_usd)",
+}
+
+CURRENCIES = {'€': 'EUR', '$': 'USD'}
+# Numeric prefix of the amount, as SQLite's CAST(... AS REAL) reads it.
+PRICE_AMOUNT = re.compile(r'\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+
+def normalize_price(price, eur_to_usd=EUR_TO_USD):
+    # The one price parser, used at ingest and for backfills. Like the CAST in
+    # the original summary query it takes the longest numeric prefix after the
+    # currency sign ("$12,50" -> 12.0); no prefix at all counts as 0.
+    if not isinstance(price, str) or price[:1] not in CURRENCIES:
+        return 0.0, None
+    currency = CURRENCIES[price[0]]
+    match = PRICE_AMOUNT.match(price, 1)
+    amount = float(match.group()) if match else 0.0
+    return (amount * eur_to_usd if currency == 'EUR' else amount), currency
+
+
+def book_row(book, eur_to_usd=EUR_TO_USD):
+    price_usd, currency = normalize_price(book['price'], eur_to_usd)
+    return (
+        str(book['id']),
+        book['title'],
+        book['author'],
+        book['genre'],
+        book['publisher'],
+        book['year'],
+        book['price'],
+        price_usd,
+        currency
+    )
+
+
+def prepare_books_table(conn, eur_to_usd=EUR_TO_USD):
     cursor = conn.cursor()
+    cursor.execute(CREATE_BOOKS_SQL)
+    cursor.execute("CREATE TABLE IF NOT EXISTS etl_settings (key TEXT PRIMARY KEY, value TEXT)")
 
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS books (
-            id TEXT PRIMARY KEY,
-            title TEXT,
-            author TEXT,
-            genre TEXT,
-            publisher TEXT,
-            year INTEGER,
-            price TEXT
-        )
+    # Databases created before prices were normalized get the new columns
+    # backfilled from the raw price text once.
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(books)")}
+    if 'price_usd' not in columns:
+        cursor.execute("ALTER TABLE books ADD COLUMN price_usd REAL")
+    if 'currency' not in columns:
+        cursor.execute("ALTER TABLE books ADD COLUMN currency TEXT")
+
+    # The EUR factor the stored price_usd values were computed with. If it
+    # differs from this run's (or was never recorded), every row is
+    # re-normalized so old and new rows never mix factors.
+    stored = cursor.execute("SELECT value FROM etl_settings WHERE key = 'eur_to_usd'").fetchone()
+    renormalize = stored is None or float(stored[0]) != float(eur_to_usd)
+
+    conn.create_function("normalize_price_usd", 1, lambda price: normalize_price(price, eur_to_usd)[0],
+                         deterministic=True)
+    conn.create_function("price_currency", 1, lambda price: normalize_price(price, eur_to_usd)[1],
+                         deterministic=True)
+    cursor.execute(f'''
+        UPDATE books
+        SET price_usd = normalize_price_usd(price),
+            currency = price_currency(price)
+        {"" if renormalize else "WHERE price_usd IS NULL"}
     ''')
+    if renormalize:
+        cursor.execute("INSERT OR REPLACE INTO etl_settings (key, value) VALUES ('eur_to_usd', ?)",
+                       (repr(float(eur_to_usd)),))
+        # UPDATE does not fire the summary triggers; recount the totals.
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'summary_totals'").fetchone():
+            rebuild_summary_totals(conn)
+    conn.commit()
+
+
+def create_indexes(conn):
+    for sql in BOOK_INDEXES.values():
+        conn.execute(sql)
+    conn.commit()
+
+
+def load_to_db(data, db_name="books.db", incremental_summary=False, eur_to_usd=EUR_TO_USD):
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+
+    prepare_books_table(conn, eur_to_usd)
+    if incremental_summary:
+        enable_incremental_summary(conn)
 
     for book in data:
-        cursor.execute('''
-            INSERT OR IGNORE INTO books (id, title, author, genre, publisher, year, price)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            str(book['id']),
-            book['title'],
-            book['author'],
-            book['genre'],
-            book['publisher'],
-            book['year'],
-            book['price']
-        ))
+        cursor.execute(INSERT_BOOK_SQL, book_row(book, eur_to_usd))
 
     conn.commit()
+    create_indexes(conn)
     return conn
 
 
-def create_summary_table(conn):
+def batched_rows(data, batch_size, eur_to_usd=EUR_TO_USD):
+    rows = iter(data)
+    while True:
+        batch = [book_row(book, eur_to_usd) for book in islice(rows, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_load_to_db(data, db_name="books.db", batch_size=50_000, incremental_summary=False,
+                    eur_to_usd=EUR_TO_USD):
+    return bulk_load_rows(batched_rows(data, batch_size, eur_to_usd), db_name,
+                          incremental_summary, eur_to_usd)
+
+
+def bulk_load_rows(batches, db_name="books.db", incremental_summary=False, eur_to_usd=EUR_TO_USD):
+    conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
 
-    cursor.execute("DROP TABLE IF EXISTS summary")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA cache_size = -262144")
+    prepare_books_table(conn, eur_to_usd)
+    if incremental_summary:
+        enable_incremental_summary(conn)
+
+    # Secondary indexes are dropped for the load and rebuilt once at the end,
+    # one sorted pass instead of a B-tree update per inserted row.
+    for name in BOOK_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+
+    started = time.perf_counter()
+    seen = inserted = 0
+    write_seconds = 0.0
+    try:
+        for batch in batches:
+            write_started = time.perf_counter()
+            with conn:
+                cursor.executemany(INSERT_BOOK_SQL, batch)
+            write_seconds += time.perf_counter() - write_started
+            seen += len(batch)
+            inserted += cursor.rowcount
+        load_seconds = time.perf_counter() - started
 
-    cursor.execute('''
-        CREATE TABLE summary AS
-        SELECT 
-            year as publication_year,
-            COUNT(*) as book_count,
-            ROUND(
-                AVG(
-                    CASE 
-                        WHEN price LIKE '€%' THEN CAST(SUBSTR(price, 2) AS REAL) * 1.2
-                        WHEN price LIKE '$%' THEN CAST(SUBSTR(price, 2) AS REAL)
-                        ELSE 0 
-                    END
-                ), 2
-            ) as average_price
+        create_indexes(conn)
+        total_seconds = time.perf_counter() - started
+    finally:
+        # Also when a batch or the batch source fails part way through.
+        cursor.execute("PRAGMA synchronous = FULL")
+        cursor.execute("PRAGMA cache_size = -2000")
+
+    print(f"Bulk load: {seen:,} rows read, {inserted:,} inserted in {total_seconds:.2f}s "
+          f"({seen / max(load_seconds, 1e-9):,.0f} rows/s load, "
+          f"writer busy {write_seconds / max(load_seconds, 1e-9):.0%}, "
+          f"{total_seconds - load_seconds:.2f}s index build)")
+    return conn
+
+
+def parse_shard(filename, queue, batch_size=50_000, eur_to_usd=EUR_TO_USD):
+    started = time.perf_counter()
+    count = 0
+    for batch in batched_rows(iter_custom_format(filename), batch_size, eur_to_usd):
+        queue.put(batch)
+        count += len(batch)
+    return filename, count, time.perf_counter() - started
+
+
+def find_shards(patterns):
+    shards = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            shards.extend(sorted(str(p) for p in path.glob("*.json")))
+        else:
+            shards.extend(sorted(glob.glob(pattern)))
+    return list(dict.fromkeys(shards))
+
+
+def load_shards(shards, db_name="books.db", workers=None, batch_size=50_000, queue_size=8,
+                incremental_summary=False, eur_to_usd=EUR_TO_USD):
+    # Shards are parsed in a process pool; SQLite has a single writer, so every
+    # batch goes through one bounded queue into this process's connection. The
+    # bound keeps fast parsers from piling up parsed rows while the writer lags.
+    with Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = manager.Queue(maxsize=queue_size)
+        pending = {pool.submit(parse_shard, shard, queue, batch_size, eur_to_usd): shard for shard in shards}
+
+        def drain():
+            try:
+                while pending or not queue.empty():
+                    try:
+                        yield queue.get(timeout=0.1)
+                    except Empty:
+                        pass
+                    for future in [f for f in pending if f.done()]:
+                        shard = pending.pop(future)
+                        try:
+                            filename, count, seconds = future.result()
+                        except Exception as e:
+                            raise RuntimeError(f"Failed to parse shard {shard}: {e}") from e
+                        print(f"  {filename}: {count:,} rows parsed in {seconds:.2f}s "
+                              f"({count / max(seconds, 1e-9):,.0f} rows/s)")
+            finally:
+                # On any failure (a shard, or the writer) the parsers still
+                # running may be blocked on the full queue. Cancel the ones
+                # not started and keep emptying the queue until the rest
+                # finish, or the pool's shutdown would wait on them forever.
+                for future in pending:
+                    future.cancel()
+                while pending:
+                    try:
+                        queue.get(timeout=0.1)
+                    except Empty:
+                        pass
+                    for future in [f for f in pending if f.done()]:
+                        del pending[future]
+
+        batches = drain()
+        try:
+            return bulk_load_rows(batches, db_name, incremental_summary, eur_to_usd)
+        finally:
+            batches.close()
+
+
+def enable_incremental_summary(conn):
+    # Running per-year count and price sum, kept current by triggers so that
+    # INSERT OR IGNORE only pays for the rows it actually inserts.
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'summary_totals'"
+    ).fetchone()
+
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS summary_totals (
+            year INTEGER,
+            book_count INTEGER NOT NULL,
+            price_sum REAL NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_totals_year ON summary_totals (year);
+
+        DROP TRIGGER IF EXISTS books_summary_insert;
+        DROP TRIGGER IF EXISTS books_summary_delete;
+
+        CREATE TRIGGER books_summary_insert AFTER INSERT ON books
+        BEGIN
+            INSERT INTO summary_totals (year, book_count, price_sum)
+            SELECT NEW.year, 0, 0
+            WHERE NOT EXISTS (SELECT 1 FROM summary_totals WHERE year IS NEW.year);
+            UPDATE summary_totals
+            SET book_count = book_count + 1,
+                price_sum = price_sum + IFNULL(NEW.price_usd, 0)
+            WHERE year IS NEW.year;
+        END;
+
+        CREATE TRIGGER books_summary_delete AFTER DELETE ON books
+        BEGIN
+            UPDATE summary_totals
+            SET book_count = book_count - 1,
+                price_sum = price_sum - IFNULL(OLD.price_usd, 0)
+            WHERE year IS OLD.year;
+        END;
+    ''')
+
+    if not exists:
+        rebuild_summary_totals(conn)
+    conn.commit()
+
+
+def rebuild_summary_totals(conn):
+    conn.execute("DELETE FROM summary_totals")
+    conn.execute('''
+        INSERT INTO summary_totals (year, book_count, price_sum)
+        SELECT year, COUNT(*), TOTAL(price_usd)
         FROM books
         GROUP BY year
-        ORDER BY year
     ''')
 
+
+def create_summary_table(conn, incremental=False):
+    cursor = conn.cursor()
+
+    cursor.execute("DROP TABLE IF EXISTS summary")
+
+    if incremental:
+        enable_incremental_summary(conn)
+        cursor.execute('''
+            CREATE TABLE summary AS
+            SELECT
+                year as publication_year,
+                book_count,
+                ROUND(price_sum / book_count, 2) as average_price
+            FROM summary_totals
+            WHERE book_count > 0
+            ORDER BY year
+        ''')
+    else:
+        cursor.execute('''
+            CREATE TABLE summary AS
+            SELECT
+                year as publication_year,
+                COUNT(*) as book_count,
+                ROUND(AVG(price_usd), 2) as average_price
+            FROM books
+            GROUP BY year
+            ORDER BY year
+        ''')
+
     conn.commit()
     print("Summary table created successfully.")
 
 
+def export_parquet(db_name, out_dir, batch_size=100_000):
+    # Columnar copy of books and summary, hive-partitioned by year, so scans can
+    # prune columns and skip partitions instead of reading books.db in full.
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from None
+
+    books_schema = pa.schema([
+        ("id", pa.uint64()),
+        ("title", pa.string()),
+        ("author", pa.string()),
+        ("genre", pa.string()),
+        ("publisher", pa.string()),
+        ("year", pa.int32()),
+        ("price", pa.string()),
+        ("price_usd", pa.float64()),
+        ("currency", pa.string()),
+    ])
+    summary_schema = pa.schema([
+        ("publication_year", pa.int32()),
+        ("book_count", pa.int64()),
+        ("average_price", pa.float64()),
+    ])
+
+    # Arrow pulls batches from its own writer thread, so this export reads
+    # through a connection of its own rather than the loader's.
+    conn = sqlite3.connect(db_name, check_same_thread=False)
+
+    def batches(query, schema, convert=None):
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            columns = list(zip(*rows))
+            if convert:
+                columns = convert(columns)
+            yield pa.record_batch(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            )
+
+    def ids_to_uint64(columns):
+        # id is TEXT in SQLite because the values overflow int64.
+        return [[int(i) for i in columns[0]]] + columns[1:]
+
+    exports = [
+        ("books", "SELECT id, title, author, genre, publisher, year, price, price_usd, currency FROM books",
+         books_schema, ids_to_uint64, "year"),
+        ("summary", "SELECT publication_year, book_count, average_price FROM summary",
+         summary_schema, None, "publication_year"),
+    ]
+    for name, query, schema, convert, partition_col in exports:
+        ds.write_dataset(
+            pa.RecordBatchReader.from_batches(schema, batches(query, schema, convert)),
+            str(Path(out_dir) / name),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([schema.field(partition_col)]), flavor="hive"),
+            existing_data_behavior="delete_matching",
+        )
+    conn.close()
+    print(f"Parquet export written to {out_dir}/books and {out_dir}/summary.")
+
+
 if __name__ == "__main__":
-    data = parse_custom_format("task1_d.json")
-    print(f"Parsed {len(data)} records.")
+    parser = argparse.ArgumentParser(description="Load Ruby-hash book dumps into SQLite.")
+    parser.add_argument("inputs", nargs="*", default=["task1_d.json"],
+                        help="shard files, glob patterns or directories of *.json shards")
+    parser.add_argument("--db", default="books.db")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--queue-size", type=int, default=8, help="max parsed batches waiting for the writer")
+    parser.add_argument("--parquet", metavar="DIR", help="also export books and summary as year-partitioned Parquet")
+    args = parser.parse_args()
 
-    connection = load_to_db(data)
+    shards = find_shards(args.inputs)
+    if not shards:
+        parser.error(f"no shard files match {args.inputs}")
+    print(f"Loading {len(shards)} shard(s).")
+
+    connection = load_shards(shards, args.db, args.workers, args.batch_size, args.queue_size,
+                             incremental_summary=True)
     print("Data loaded into 'books' table.")
 
-    create_summary_table(connection)
+    create_summary_table(connection, incremental=True)
+
+    if args.parquet:
+        export_parquet(args.db, args.parquet)
 
     cursor = connection.cursor()
 
@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from metrics import MetricContext, OrderAggregates, compute_metrics
+from processing import clean_prices, parse_books_yaml, parse_dates_by_layout, resolve_users_union_find
+from schema import project_books, read_orders, read_users
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+# Stage timings below this many seconds are treated as noise and never fail.
+MIN_SECONDS = 0.05
+
+
+def scaled_dataset(source, factor, dest):
+    # DATA folder replicated `factor` times. Every copy gets its own user and
+    # book ids and its own emails/phones/addresses, so the copies stay
+    # separate datasets instead of collapsing into one identity cluster.
+    dest.mkdir(parents=True, exist_ok=True)
+    orders = pq.read_table(source / "orders.parquet")
+    users = pd.read_csv(source / "users.csv")
+    books = parse_books_yaml(str(source / "books.yaml"))
+    user_offset = int(users['id'].max()) + 1
+    book_offset = int(pd.to_numeric(books['id']).max()) + 1
+
+    with pq.ParquetWriter(dest / "orders.parquet", orders.schema) as writer:
+        for copy in range(factor):
+            batch = orders.set_column(orders.schema.get_field_index('user_id'), 'user_id',
+                                      pa.compute.add(orders['user_id'], copy * user_offset))
+            batch = batch.set_column(batch.schema.get_field_index('book_id'), 'book_id',
+                                     pa.compute.add(batch['book_id'], copy * book_offset))
+            writer.write_table(batch)
+
+    copies = []
+    for copy in range(factor):
+        part = users.copy()
+        part['id'] += copy * user_offset
+        if copy:
+            # Blank values stay blank; a "000<copy>" prefix cannot collide
+            # with a real number once phones are reduced to their digits.
+            for column, prefix in [('email', f"{copy}."), ('address', f"{copy} "), ('phone', f"000{copy} ")]:
+                filled = part[column].notna() & (part[column].astype(str).str.strip() != '')
+                part.loc[filled, column] = prefix + part.loc[filled, column]
+        copies.append(part)
+    pd.concat(copies).to_csv(dest / "users.csv", index=False)
+
+    records = []
+    for copy in range(factor):
+        for book in books.to_dict('records'):
+            book = {key: (None if pd.isna(value) else value) for key, value in book.items()}
+            if copy:
+                book['id'] = book['id'] + copy * book_offset
+            records.append({f":{key}": value for key, value in book.items()})
+    with open(dest / "books.yaml", 'w', encoding='utf-8') as f:
+        yaml.safe_dump(records, f, explicit_start=True, sort_keys=False, allow_unicode=True)
+    return dest
+
+
+def measure(func, repeat):
+    # Best wall time of `repeat` untraced runs, then one traced run for the
+    # peak Python memory the stage allocates.
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_mb": peak / 1024 / 1024}
+
+
+def run_stages(folder, repeat):
+    # The stages of processing.load_and_process_data, one at a time.
+    stats = {}
+    books, stats['yaml'] = measure(lambda: parse_books_yaml(str(folder / "books.yaml")), repeat)
+    books = project_books(books)
+    (orders, users), stats['read'] = measure(
+        lambda: (read_orders(folder / "orders.parquet"), read_users(folder / "users.csv")), repeat)
+    dates, stats['dates'] = measure(lambda: parse_dates_by_layout(orders['timestamp']), repeat)
+    prices, stats['prices'] = measure(lambda: clean_prices(orders['unit_price']), repeat)
+    (user_map, grouped_ids), stats['users'] = measure(lambda: resolve_users_union_find(users), repeat)
+
+    orders['date_obj'] = dates
+    orders['paid_price'] = orders['quantity'] * prices
+    aggregates, stats['aggregate'] = measure(lambda: OrderAggregates.from_orders(orders), repeat)
+    _, stats['metrics'] = measure(
+        lambda: compute_metrics(MetricContext(aggregates, books, user_map, grouped_ids)), repeat)
+    return stats, len(orders)
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    for dataset, stages in results.items():
+        for stage, now in stages.items():
+            before = baseline.get(dataset, {}).get(stage)
+            if before is None:
+                continue
+            if now['seconds'] > before['seconds'] * (1 + threshold) and now['seconds'] - before['seconds'] > MIN_SECONDS:
+                failures.append(f"{dataset}/{stage}: {before['seconds']:.3f}s -> {now['seconds']:.3f}s")
+            if now['peak_mb'] > before['peak_mb'] * (1 + threshold) and now['peak_mb'] - before['peak_mb'] > 1:
+                failures.append(f"{dataset}/{stage}: {before['peak_mb']:.1f} MB -> {now['peak_mb']:.1f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Task4 pipeline stage by stage.")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated DATA1 replication factors")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (best is kept)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown/growth vs baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        datasets = {folder: DATA_ROOT / folder for folder in ["DATA1", "DATA2", "DATA3"]}
+        for factor in map(int, args.scales.split(',')):
+            if factor > 1:
+                datasets[f"DATA1x{factor}"] = scaled_dataset(DATA_ROOT / "DATA1", factor, Path(tmp) / f"x{factor}")
+
+        results = {}
+        print(f"{'Dataset':<10} | {'Orders':>9} | {'Stage':<9} | {'Time (s)':>8} | {'Peak (MB)':>9}")
+        print("-" * 58)
+        for name, folder in datasets.items():
+            results[name], rows = run_stages(folder, args.repeat)
+            for stage, stat in results[name].items():
+                print(f"{name:<10} | {rows:>9} | {stage:<9} | {stat['seconds']:>8.3f} | {stat['peak_mb']:>9.1f}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save to create one.")
+        return 0
+
+    failures = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print(f"{len(failures)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
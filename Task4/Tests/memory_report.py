@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import load_books
+from schema import memory_usage, project_books, read_orders, read_users
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+
+def mb(n):
+    return n / 1024 / 1024
+
+
+print("--- MEMORY REPORT: default reads vs typed schema ---")
+print(f"{'Dataset':<8} | {'Input':<6} | {'default (MB)':>12} | {'typed (MB)':>10} | {'Saved':>6}")
+print("-" * 56)
+
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    path = DATA_ROOT / folder
+    books = load_books(path / "books.yaml")
+    inputs = {
+        "orders": (pd.read_parquet(path / "orders.parquet"), read_orders(path / "orders.parquet")),
+        "users": (pd.read_csv(path / "users.csv"), read_users(path / "users.csv")),
+        "books": (books, project_books(books)),
+    }
+
+    total_before = total_after = 0
+    for name, (default, typed) in inputs.items():
+        assert len(default) == len(typed), (folder, name)
+        for column in typed.columns:
+            assert typed[column].astype(object).equals(default[column].astype(object)), (folder, name, column)
+        before, after = memory_usage(default), memory_usage(typed)
+        total_before += before
+        total_after += after
+        print(f"{folder:<8} | {name:<6} | {mb(before):>12.2f} | {mb(after):>10.2f} | {1 - after / before:>5.0%}")
+    print(f"{folder:<8} | {'total':<6} | {mb(total_before):>12.2f} | {mb(total_after):>10.2f} | "
+          f"{1 - total_after / total_before:>5.0%}")
@@ -0,0 +1,50 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import data_cache
+from data_cache import read_artifact, write_artifact
+from processing import load_and_process_data
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+print("--- ROUND TRIP: metrics artifacts ---")
+with tempfile.TemporaryDirectory() as tmp:
+    for folder in ["DATA1", "DATA2", "DATA3"]:
+        expected = load_and_process_data(DATA_ROOT / folder)
+        path = Path(tmp) / f"{folder}.metrics.parquet"
+        write_artifact(path, ["signature", folder], expected)
+        signature, actual = read_artifact(path)
+
+        assert signature == ["signature", folder], folder
+        assert list(actual) == list(expected), folder
+        for key, value in expected.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(actual[key], value)
+            else:
+                assert actual[key] == value, (folder, key)
+        print(f"{folder}: {len(expected)} entries identical, artifact {path.stat().st_size / 1024:.0f} KB")
+
+    path = Path(tmp) / "empty.metrics.parquet"
+    write_artifact(path, ["empty"], None)
+    assert read_artifact(path) == (["empty"], None)
+    print("empty dataset: stored as None")
+
+print("--- ONE ARTIFACT PER BACKEND ---")
+with tempfile.TemporaryDirectory() as tmp:
+    data_cache.CACHE_DIR = Path(tmp)
+    folder = DATA_ROOT / "DATA1"
+    backends = ["pandas", "duckdb"]
+    for backend in backends:
+        data_cache.load_metrics(folder, backend)
+    data_cache._memory.clear()
+    for backend in backends:
+        assert data_cache.is_fresh(folder, backend), backend
+        data_cache.load_metrics(folder, backend)
+        assert data_cache.last_profile(folder, backend).context["source"] == "artifact", backend
+    data_cache.invalidate(folder)
+    assert not any(data_cache.is_fresh(folder, backend) for backend in backends)
+    print("pandas and duckdb artifacts are kept side by side and invalidated together")
@@ -0,0 +1,48 @@
+import re
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import yaml
+from processing import load_books, parse_books_yaml
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+print("--- PARITY & BENCHMARK: load_books vs parse_books_yaml ---")
+print(f"{'Dataset':<8} | {'Rows':>5} | {'SafeLoader (s)':>14} | {'C loader (s)':>12} | {'sidecar (s)':>11}")
+print("-" * 64)
+
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    path = DATA_ROOT / folder / "books.yaml"
+    sidecar = path.with_name(path.name + '.parquet')
+    sidecar.unlink(missing_ok=True)
+
+    expected = parse_books_yaml(str(path))
+    assert load_books(path).equals(expected), folder
+    assert sidecar.exists(), folder
+    cached = load_books(path)
+    assert cached.equals(expected), folder
+    assert [type(v) for v in cached['year']] == [type(v) for v in expected['year']], folder
+
+    # Pure-Python loader, for comparison with the original parser.
+    content = path.read_text(encoding='utf-8')
+    content = re.sub(r':(\w+)', r'\1', content)
+    safe_time = min(timeit.repeat(lambda: yaml.load(content, Loader=yaml.SafeLoader), number=1, repeat=3))
+    c_time = min(timeit.repeat(lambda: parse_books_yaml(str(path)), number=1, repeat=3))
+    sidecar_time = min(timeit.repeat(lambda: load_books(path), number=1, repeat=3))
+    print(f"{folder:<8} | {len(expected):>5} | {safe_time:>14.3f} | {c_time:>12.3f} | {sidecar_time:>11.3f}")
+
+# A broken books.yaml raises and leaves no sidecar behind to serve later.
+with tempfile.TemporaryDirectory() as tmp:
+    path = Path(tmp) / "books.yaml"
+    path.write_text("- :id: 1\n  :title: [unclosed\n", encoding='utf-8')
+    for _ in range(2):
+        try:
+            load_books(path)
+            raise AssertionError("a broken books.yaml loaded without error")
+        except ValueError as e:
+            assert "books.yaml" in str(e), e
+    assert not path.with_name(path.name + '.parquet').exists()
+print("A broken books.yaml raises and is not cached.")
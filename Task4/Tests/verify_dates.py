@@ -0,0 +1,27 @@
+import sys
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import parse_custom_dates, parse_dates_by_layout
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+print("--- PARITY & BENCHMARK: parse_dates_by_layout vs parse_custom_dates ---")
+print(f"{'Dataset':<8} | {'Rows':>6} | {'NaT':>5} | {'mixed (s)':>9} | {'layout (s)':>10} | {'Speedup':>7}")
+print("-" * 62)
+
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    timestamps = pd.read_parquet(DATA_ROOT / folder / "orders.parquet")['timestamp']
+
+    expected = parse_custom_dates(timestamps)
+    actual = parse_dates_by_layout(timestamps)
+    assert actual.dtype == expected.dtype, folder
+    assert actual.equals(expected), folder
+
+    mixed_time = min(timeit.repeat(lambda: parse_custom_dates(timestamps), number=1, repeat=3))
+    layout_time = min(timeit.repeat(lambda: parse_dates_by_layout(timestamps), number=1, repeat=3))
+    print(f"{folder:<8} | {len(timestamps):>6} | {expected.isna().sum():>5} | {mixed_time:>9.3f} | "
+          f"{layout_time:>10.3f} | {mixed_time / layout_time:>6.1f}x")
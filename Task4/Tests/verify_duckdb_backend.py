@@ -0,0 +1,44 @@
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import duckdb_backend
+import processing
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+print("--- PARITY: DuckDB backend vs pandas backend ---")
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    start = time.perf_counter()
+    expected = processing.load_and_process_data(DATA_ROOT / folder)
+    pandas_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = duckdb_backend.load_and_process_data(DATA_ROOT / folder)
+    duckdb_time = time.perf_counter() - start
+
+    assert set(actual) == set(expected), folder
+    for key, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            assert actual[key]['Date'].equals(value['Date']), (folder, key)
+            assert np.allclose(actual[key]['Revenue'], value['Revenue']), (folder, key)
+        elif key in ("top_5_days_values", "top_spender_amount", "total_revenue"):
+            assert np.allclose(actual[key], value), (folder, key)
+        else:
+            assert actual[key] == value, (folder, key)
+
+    print(f"{folder:<6} | identical metrics | pandas {pandas_time:.2f}s | duckdb {duckdb_time:.2f}s")
+
+# File paths go into the view definitions as SQL string literals.
+with tempfile.TemporaryDirectory() as tmp:
+    folder = Path(tmp) / "O'Brien's DATA1"
+    shutil.copytree(DATA_ROOT / "DATA1", folder)
+    actual = duckdb_backend.load_and_process_data(folder)
+    assert actual["total_revenue"] == duckdb_backend.load_and_process_data(DATA_ROOT / "DATA1")["total_revenue"]
+print("A folder name with quotes loads the same metrics.")
@@ -0,0 +1,37 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from generate_data import generate_dataset
+from processing import clean_prices, load_and_process_data, parse_custom_dates, parse_dates_by_layout
+
+ORDERS = 60_000
+
+print("--- SYNTHETIC DATA: determinism and parser coverage ---")
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = Path(tmp)
+    generate_dataset(tmp / "a", ORDERS, seed=7, chunk_size=20_000, workers=1)
+    generate_dataset(tmp / "b", ORDERS, seed=7, chunk_size=20_000, workers=3)
+    for name in ["books.yaml", "users.csv"]:
+        assert (tmp / "a" / name).read_bytes() == (tmp / "b" / name).read_bytes(), name
+    orders = pd.read_parquet(tmp / "a" / "orders.parquet")
+    assert orders.equals(pd.read_parquet(tmp / "b" / "orders.parquet"))
+    print(f"seed 7: identical output with 1 and 3 workers ({len(orders):,} orders)")
+
+    # Every timestamp parses except the "A.M."/"P.M." spellings, which the
+    # original parser also leaves as NaT; every price yields a positive amount.
+    dates = parse_dates_by_layout(orders['timestamp'])
+    assert dates.equals(parse_custom_dates(orders['timestamp']))
+    assert orders['timestamp'][dates.isna()].str.contains(r'[AP]\.M\.').all()
+    assert (clean_prices(orders['unit_price']) > 0).all()
+    print(f"timestamps: {dates.isna().mean():.1%} NaT, all A.M./P.M.; prices: all parsed")
+
+    for rate in [0.0, 0.2]:
+        generate_dataset(tmp / f"dup{rate}", 3000, users=2000, duplicate_rate=rate, seed=1, workers=1)
+        unique = load_and_process_data(tmp / f"dup{rate}")['unique_users']
+        # The number of aliases is binomial: allow three standard deviations.
+        assert abs(unique - 2000 * (1 - rate)) <= 3 * (2000 * rate * (1 - rate)) ** 0.5 + 5, (rate, unique)
+        print(f"duplicate rate {rate:.0%}: {unique} unique users out of 2000")
@@ -0,0 +1,80 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from identity import IdentityIndex, resolve_users_incremental
+from processing import resolve_users_union_find
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+print("--- INCREMENTAL IDENTITY INDEX vs FULL REBUILD ---")
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    users = pd.read_csv(DATA_ROOT / folder / "users.csv")
+    expected_map, expected_groups = resolve_users_union_find(users)
+
+    # Users arriving in shuffled batches end up in the same clusters.
+    shuffled = users.sample(frac=1, random_state=7)
+    index = IdentityIndex()
+    for bounds in np.array_split(np.arange(len(shuffled)), 9):
+        index.add_users(shuffled.iloc[bounds])
+    assert index.mapping == expected_map, folder
+    assert index.grouped_ids == expected_groups, folder
+
+    # A persisted index only resolves rows appended since it was saved.
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "identity.pkl"
+        resolve_users_incremental(users.iloc[:len(users) // 2], path)
+        mapping, grouped_ids = resolve_users_incremental(users, path)
+        assert mapping == expected_map and grouped_ids == expected_groups, folder
+        assert len(IdentityIndex.load(path)) == users['id'].nunique(), folder
+
+        # Removed users force a rebuild instead of keeping stale clusters.
+        mapping, _ = resolve_users_incremental(users.iloc[:100], path)
+        assert set(mapping) == set(users['id'].iloc[:100]), folder
+
+        # So do edited contact fields: a user moved out of its cluster by
+        # giving it an email/phone/address nobody else has.
+        resolve_users_incremental(users, path)
+        uid = next(group for group in expected_groups.values() if len(group) > 1)[-1]
+        edited = users.copy()
+        row = edited['id'] == uid
+        edited.loc[row, 'email'] = f"moved-{uid}@example.invalid"
+        edited.loc[row, 'phone'] = f"000-{uid}"
+        edited.loc[row, 'address'] = f"{uid} Nowhere Lane"
+        assert resolve_users_incremental(edited, path) == resolve_users_union_find(edited), folder
+        assert expected_map[uid] != uid and resolve_users_incremental(edited, path)[0][uid] == uid, folder
+
+        # Ids narrowed to a small dtype next to a stored index of wider ids.
+        small = users.iloc[:50].assign(id=np.arange(50, dtype=np.int16))
+        assert resolve_users_incremental(small, path) == resolve_users_union_find(small), folder
+
+        # Repeated ids are one user each, whose extra rows bring another
+        # user's email; also when the extra rows arrive in a later batch.
+        third = len(users) // 3
+        extra = users.iloc[:third].assign(email=users['email'].iloc[-third:].to_numpy())
+        repeated = pd.concat([users, extra], ignore_index=True)
+        expected = resolve_users_union_find(repeated)
+        assert expected != (expected_map, expected_groups), folder
+        path.unlink()
+        assert resolve_users_incremental(repeated, path) == expected, folder
+        assert resolve_users_incremental(repeated, path) == expected, folder
+        resolve_users_incremental(users, path)
+        assert resolve_users_incremental(repeated, path) == expected, folder
+        index = IdentityIndex()
+        index.add_users(users)
+        index.add_users(extra)
+        assert (index.mapping, index.grouped_ids) == expected, folder
+
+    print(f"{folder:<6} | {len(users):>5} users | {len(expected_groups):>5} identities | identical")
+
+repeated = pd.DataFrame({'id': [1, 2, 3, 1], 'email': ['a', 'b', 'c', 'x'],
+                         'phone': ['1', '2', '3', '4'], 'address': ['p', 'q', 'r', 'q']})
+expected = ({1: 1, 2: 1, 3: 3}, {1: [1, 2], 3: [3]})
+assert resolve_users_union_find(repeated) == expected
+with tempfile.TemporaryDirectory() as tmp:
+    assert resolve_users_incremental(repeated, Path(tmp) / "identity.pkl") == expected
+print("Repeated ids join the clusters of all their rows' keys.")
@@ -0,0 +1,103 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from metrics import MetricContext, OrderAggregates, compute_metrics, normalize_authors
+from processing import clean_prices, parse_books_yaml, parse_dates_by_layout, resolve_users_union_find
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+
+def legacy_metrics(orders, books, user_map, grouped_ids):
+    # The multi-pass aggregation load_and_process_data used before the engine.
+    orders['date_str'] = orders['date_obj'].dt.strftime('%Y-%m-%d')
+    orders['real_user_id'] = orders['user_id'].map(user_map).fillna(orders['user_id'])
+
+    daily_rev = orders.groupby('date_str')['paid_price'].sum().sort_values(ascending=False)
+    top_5_days = daily_rev.head(5)
+
+    merged = orders.merge(books, left_on='book_id', right_on='id', how='left')
+    merged['author_set'] = merged['author'].apply(normalize_authors)
+    author_sales = merged.groupby('author_set')['quantity'].sum()
+
+    user_spending = orders.groupby('real_user_id')['paid_price'].sum()
+    top_spender_real_id = user_spending.idxmax()
+
+    daily_rev_sorted = orders.groupby('date_obj')['paid_price'].sum().sort_index().reset_index()
+    daily_rev_sorted.columns = ['Date', 'Revenue']
+
+    return {
+        "top_5_days": top_5_days.index.tolist(),
+        "top_5_days_values": top_5_days.values.tolist(),
+        "unique_users": len(set(user_map.values())),
+        "unique_authors": merged['author_set'].nunique(),
+        "top_author": author_sales.idxmax(),
+        "top_author_sales": author_sales.max(),
+        "top_buyer_ids": grouped_ids.get(top_spender_real_id, [top_spender_real_id]),
+        "top_spender_amount": user_spending.max(),
+        "daily_revenue_df": daily_rev_sorted,
+        "total_revenue": orders['paid_price'].sum(),
+        "total_orders": len(orders),
+        "date_range": (orders['date_obj'].min(), orders['date_obj'].max())
+    }
+
+
+def engine_metrics(orders, books, user_map, grouped_ids):
+    return compute_metrics(MetricContext(OrderAggregates.from_orders(orders), books, user_map, grouped_ids))
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def assert_same(actual, expected, label):
+    assert set(actual) == set(expected), label
+    for key, value in expected.items():
+        other = actual[key]
+        if isinstance(value, pd.DataFrame):
+            assert other['Date'].equals(value['Date']), (label, key)
+            assert np.allclose(other['Revenue'], value['Revenue']), (label, key)
+        elif key in ("top_5_days_values", "top_spender_amount", "total_revenue"):
+            assert np.allclose(other, value), (label, key)
+        else:
+            assert other == value, (label, key)
+
+
+def prepared_inputs(folder, scale=1):
+    books = parse_books_yaml(str(DATA_ROOT / folder / "books.yaml"))
+    orders = pd.read_parquet(DATA_ROOT / folder / "orders.parquet")
+    users = pd.read_csv(DATA_ROOT / folder / "users.csv")
+    if scale > 1:
+        orders = pd.concat([orders] * scale, ignore_index=True)
+    orders['date_obj'] = parse_dates_by_layout(orders['timestamp'])
+    orders['paid_price'] = orders['quantity'] * clean_prices(orders['unit_price'])
+    user_map, grouped_ids = resolve_users_union_find(users)
+    return orders, books, user_map, grouped_ids
+
+
+print("--- METRICS ENGINE vs LEGACY AGGREGATION ---")
+print(f"{'Dataset':<12} | {'Orders':>7} | {'legacy (s)':>10} | {'engine (s)':>10} | "
+      f"{'legacy peak':>11} | {'engine peak':>11}")
+print("-" * 78)
+
+for folder, scale in [("DATA1", 1), ("DATA2", 1), ("DATA3", 1), ("DATA1", 10)]:
+    orders, books, user_map, grouped_ids = prepared_inputs(folder, scale)
+    label = folder if scale == 1 else f"{folder} x{scale}"
+
+    expected, legacy_time, legacy_peak = measure(legacy_metrics, orders.copy(), books, user_map, grouped_ids)
+    actual, engine_time, engine_peak = measure(engine_metrics, orders, books, user_map, grouped_ids)
+    assert_same(actual, expected, label)
+
+    print(f"{label:<12} | {len(orders):>7} | {legacy_time:>10.3f} | {engine_time:>10.3f} | "
+          f"{legacy_peak / 2**20:>8.1f} MB | {engine_peak / 2**20:>8.1f} MB")
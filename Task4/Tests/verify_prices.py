@@ -0,0 +1,39 @@
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import clean_price, clean_prices
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+edge_cases = pd.Series([
+    None, np.nan, '', '   ', 'free', '$12', '12,99', '12,99 €', '€50¢50', 'EUR 17.75', '17.75 EUR',
+    'USD58', '$ 29.99', '1.2.3', '€', '007.50$', ' 9 € 99 ¢ 1',
+    '٣٤', '€٣٤,٥', '$١٢.50', '१२३ USD',
+], dtype=object)
+
+print("--- PARITY: clean_prices vs clean_price ---")
+samples = [("edge cases", edge_cases)]
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    samples.append((folder, pd.read_parquet(DATA_ROOT / folder / "orders.parquet")['unit_price']))
+
+for label, prices in samples:
+    expected = prices.apply(clean_price).astype(float)
+    actual = clean_prices(prices)
+    assert actual.index.equals(expected.index), label
+    assert np.array_equal(actual.to_numpy(), expected.to_numpy()), label
+    print(f"{label:<10} | {len(prices):>6} rows | identical")
+
+print("\n--- MICROBENCHMARK (1M rows) ---")
+prices = pd.concat([s for _, s in samples[1:]], ignore_index=True)
+prices = pd.Series(np.resize(prices.to_numpy(), 1_000_000), dtype=prices.dtype)
+
+apply_time = min(timeit.repeat(lambda: prices.apply(clean_price), number=1, repeat=3))
+vector_time = min(timeit.repeat(lambda: clean_prices(prices), number=1, repeat=3))
+print(f"clean_price .apply : {apply_time:.3f}s")
+print(f"clean_prices       : {vector_time:.3f}s")
+print(f"speedup            : {apply_time / vector_time:.1f}x")
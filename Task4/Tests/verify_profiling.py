@@ -0,0 +1,44 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import profiling
+from processing import load_and_process_data, resolve_users_union_find
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+with tempfile.TemporaryDirectory() as tmp:
+    profiling.LOG_PATH = str(Path(tmp) / "profile.jsonl")
+
+    # Outside a profile() block the stages are no-ops.
+    expected = load_and_process_data(DATA_ROOT / "DATA1")
+
+    with profiling.profile("DATA1", backend="pandas") as current:
+        result = load_and_process_data(DATA_ROOT / "DATA1", resolve=resolve_users_union_find)
+    assert result['total_revenue'] == expected['total_revenue']
+    assert result['top_buyer_ids'] == expected['top_buyer_ids']
+
+    stages = {}
+    for record in current.stages:
+        stages.setdefault(record['stage'], record)
+    for name in ["read_books", "read_orders", "read_users", "dates", "prices", "aggregate",
+                 "resolve_users", "resolve_users/keys", "resolve_users/union_find", "resolve_users/groups", "metrics"]:
+        assert name in stages, name
+        assert stages[name]['seconds'] >= 0, name
+    assert stages['read_orders']['rows'] == result['total_orders']
+    assert stages['resolve_users']['seconds'] >= stages['resolve_users/union_find']['seconds']
+
+    lines = Path(profiling.LOG_PATH).read_text().splitlines()
+    assert len(lines) == 1
+    logged = json.loads(lines[0])
+    assert logged['label'] == "DATA1" and logged['backend'] == "pandas"
+    assert [record['stage'] for record in logged['stages']] == [record['stage'] for record in current.stages]
+
+    print(f"{'Stage':<26} | {'Rows':>6} | {'Time (s)':>8} | {'Memory Δ (MB)':>13}")
+    print("-" * 62)
+    for record in current.stages:
+        memory = "-" if record['memory_mb'] is None else f"{record['memory_mb']:.1f}"
+        rows = "-" if record['rows'] is None else record['rows']
+        print(f"{record['stage']:<26} | {rows:>6} | {record['seconds']:>8.3f} | {memory:>13}")
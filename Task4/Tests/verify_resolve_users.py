@@ -0,0 +1,64 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import resolve_users, resolve_users_union_find
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+SYNTHETIC_USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def partition(grouped_ids):
+    return sorted(tuple(sorted(group)) for group in grouped_ids.values())
+
+
+def synthetic_users(n, seed=42):
+    # Roughly 10% of rows reuse another row's email, phone or address
+    # (with case/format noise), chaining some identities together.
+    rng = np.random.default_rng(seed)
+    ids = rng.permutation(n) + 10_000
+    email = pd.Series([f"user{i}@example.test" for i in range(n)], dtype=object)
+    phone = pd.Series([f"({i % 900 + 100}) {i // 900 % 900 + 100}-{i % 10_000:04d}" for i in range(n)], dtype=object)
+    address = pd.Series([f"{i} Main St, Springfield" for i in range(n)], dtype=object)
+
+    for column, noise in [(email, str.upper), (phone, lambda p: ''.join(c for c in p if c.isdigit())),
+                          (address, str.upper)]:
+        rows = rng.choice(n, n // 30, replace=False)
+        donors = rng.integers(0, n, len(rows))
+        column.iloc[rows] = [noise(v) for v in column.iloc[donors]]
+        blanks = rng.choice(n, n // 50, replace=False)
+        column.iloc[blanks] = rng.choice([np.nan, "", "  "], len(blanks))
+
+    return pd.DataFrame({'id': ids, 'name': "x", 'address': address, 'phone': phone, 'email': email})
+
+
+print("--- PARITY: resolve_users_union_find vs resolve_users (networkx) ---")
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    users = pd.read_csv(DATA_ROOT / folder / "users.csv")
+    expected_map, expected_groups = resolve_users(users)
+    actual_map, actual_groups = resolve_users_union_find(users)
+
+    assert set(actual_map) == set(expected_map), folder
+    assert partition(actual_groups) == partition(expected_groups), folder
+    assert all(actual_map[uid] in actual_groups[actual_map[uid]] for uid in actual_map), folder
+    print(f"{folder:<6} | {len(users):>5} users | {len(actual_groups):>5} identities | identical clusters")
+
+print(f"\n--- BENCHMARK ({SYNTHETIC_USERS:,} synthetic users) ---")
+users = synthetic_users(SYNTHETIC_USERS)
+
+start = time.perf_counter()
+fast_map, fast_groups = resolve_users_union_find(users)
+fast_time = time.perf_counter() - start
+print(f"union-find : {fast_time:.2f}s ({len(fast_groups):,} identities)")
+
+start = time.perf_counter()
+graph_map, graph_groups = resolve_users(users)
+graph_time = time.perf_counter() - start
+print(f"networkx   : {graph_time:.2f}s ({len(graph_groups):,} identities)")
+
+assert partition(fast_groups) == partition(graph_groups)
+print(f"speedup    : {graph_time / fast_time:.1f}x, identical clusters")
@@ -1,5 +1,15 @@
-import pandas as pd
 import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import load_and_process_data
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
 
 def clean_price(price_str):
     if pd.isna(price_str) or price_str == '': return 0.0
@@ -12,17 +22,25 @@ def clean_price(price_str):
     if is_euro: val = val * 1.2
     return val
 
-df = pd.read_parquet("../DATA1/orders.parquet")
 
-df['timestamp'] = df['timestamp'].astype(str).str.replace(';', ' ').str.replace(',', ' ')
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    df = pd.read_parquet(DATA_ROOT / folder / "orders.parquet")
+
+    df['timestamp'] = df['timestamp'].astype(str).str.replace(';', ' ').str.replace(',', ' ')
+
+    df['date_obj'] = pd.to_datetime(df['timestamp'], format='mixed', dayfirst=False, errors='coerce')
+    df['date_str'] = df['date_obj'].dt.strftime('%Y-%m-%d')
 
-df['date_obj'] = pd.to_datetime(df['timestamp'], format='mixed', dayfirst=False, errors='coerce')
-df['date_str'] = df['date_obj'].dt.strftime('%Y-%m-%d')
+    df['clean_price'] = df['unit_price'].apply(clean_price)
+    df['total_val'] = df['quantity'] * df['clean_price']
 
-df['clean_price'] = df['unit_price'].apply(clean_price)
-df['total_val'] = df['quantity'] * df['clean_price']
+    daily_stats = df.groupby('date_str')['total_val'].sum().sort_values(ascending=False)
 
-daily_stats = df.groupby('date_str')['total_val'].sum().sort_values(ascending=False)
+    # Independent row-by-row computation against the pipeline's top 5 days.
+    result = load_and_process_data(DATA_ROOT / folder)
+    assert result['top_5_days'] == daily_stats.head(5).index.tolist(), folder
+    assert np.allclose(result['top_5_days_values'], daily_stats.head(5).values, rtol=1e-12), folder
+    assert np.isclose(result['total_revenue'], df['total_val'].sum(), rtol=1e-12), folder
 
-print("--- TOP 5 REVENUE DAYS (VERIFICATION) ---")
-print(daily_stats.head(5))
\ No newline at end of file
+    print(f"--- TOP 5 REVENUE DAYS ({folder}) ---")
+    print(daily_stats.head(5))
@@ -1,34 +1,47 @@
+import re
+import sys
+from pathlib import Path
+
 import pandas as pd
 import yaml
-import re
 
-print("Loading Books...")
-with open("../DATA3/books.yaml", 'r', encoding='utf-8') as f:
-    content = re.sub(r':(\w+)', r'\1', f.read())
-books = pd.DataFrame(yaml.safe_load(content))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import load_and_process_data
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
 
-print("Loading Orders...")
-orders = pd.read_parquet("../DATA3/orders.parquet")
-merged = orders.merge(books, left_on='book_id', right_on='id', how='left')
 
 def normalize_authors(auth_str):
     if not isinstance(auth_str, str): return "Unknown"
     parts = sorted([a.strip() for a in auth_str.split(',')])
     return ", ".join(parts)
 
-print("Normalizing Author sets...")
-merged['author_set'] = merged['author'].apply(normalize_authors)
 
-top_authors = merged.groupby('author_set')['quantity'].sum().sort_values(ascending=False).head(10)
+for folder in ["DATA1", "DATA2", "DATA3"]:
+    with open(DATA_ROOT / folder / "books.yaml", 'r', encoding='utf-8') as f:
+        content = re.sub(r':(\w+)', r'\1', f.read())
+    books = pd.DataFrame(yaml.safe_load(content))
+
+    orders = pd.read_parquet(DATA_ROOT / folder / "orders.parquet")
+    merged = orders.merge(books, left_on='book_id', right_on='id', how='left')
+    merged['author_set'] = merged['author'].apply(normalize_authors)
+
+    author_sales = merged.groupby('author_set')['quantity'].sum()
+    top_authors = author_sales.sort_values(ascending=False).head(10)
+
+    result = load_and_process_data(DATA_ROOT / folder)
+    assert result['top_author'] == author_sales.idxmax(), folder
+    assert result['top_author_sales'] == author_sales.max(), folder
+    assert result['unique_authors'] == author_sales.index.nunique(), folder
 
-print("\n" + "="*40)
-print("TOP 10 MOST POPULAR AUTHORS (DATA1)")
-print("="*40)
-print(f"{'Rank':<5} | {'Quantity Sold':<15} | {'Author(s)'}")
-print("-" * 40)
+    print("\n" + "="*40)
+    print(f"TOP 10 MOST POPULAR AUTHORS ({folder})")
+    print("="*40)
+    print(f"{'Rank':<5} | {'Quantity Sold':<15} | {'Author(s)'}")
+    print("-" * 40)
 
-rank = 1
-for author, quantity in top_authors.items():
-    print(f"{rank:<5} | {quantity:<15} | {author}")
-    rank += 1
-print("="*40)
\ No newline at end of file
+    rank = 1
+    for author, quantity in top_authors.items():
+        print(f"{rank:<5} | {quantity:<15} | {author}")
+        rank += 1
+    print("="*40)
@@ -1,8 +1,42 @@
+import re
+import sys
+from pathlib import Path
+
 import pandas as pd
 
-users = pd.read_csv("../DATA1/users.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processing import load_and_process_data
+
+DATA_ROOT = Path(__file__).resolve().parent.parent
+
+# Best buyer aliases found by hand in each dataset's users.csv.
+EXPECTED_ALIASES = {
+    "DATA1": [44850, 45062, 46955],
+    "DATA2": [53583, 55058, 55420],
+    "DATA3": [49715, 50963],
+}
+
+
+def keys(row):
+    found = set()
+    if isinstance(row['email'], str) and row['email'].strip():
+        found.add(('email', row['email'].strip().lower()))
+    if isinstance(row['phone'], str) and re.sub(r'\D', '', row['phone']):
+        found.add(('phone', re.sub(r'\D', '', row['phone'])))
+    if isinstance(row['address'], str) and row['address'].strip():
+        found.add(('address', row['address'].strip().lower()))
+    return found
+
+
+for folder, target_ids in EXPECTED_ALIASES.items():
+    users = pd.read_csv(DATA_ROOT / folder / "users.csv")
+    suspects = users[users['id'].isin(target_ids)]
+    print(suspects)
 
-target_ids = [44850, 46955, 45062]
+    assert sorted(suspects['id']) == target_ids, folder
+    # Every alias shares an email, phone or address with at least one other.
+    suspect_keys = [keys(row) for _, row in suspects.iterrows()]
+    for i, own in enumerate(suspect_keys):
+        assert any(own & other for j, other in enumerate(suspect_keys) if j != i), (folder, target_ids[i])
 
-suspects = users[users['id'].isin(target_ids)]
-print(suspects)
\ No newline at end of file
+    assert load_and_process_data(DATA_ROOT / folder)['top_buyer_ids'] == target_ids, folder
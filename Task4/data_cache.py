@@ -0,0 +1,204 @@
+import hashlib
+import importlib.util
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import duckdb_backend
+import processing
+from delta import refresh_aggregates
+from identity import resolve_users_incremental
+from persistence import atomic_path
+from profiling import profile, stage
+
+CACHE_DIR = Path(__file__).parent / ".cache"
+INPUT_FILES = ("books.yaml", "orders.parquet", "users.csv")
+
+BACKENDS = {
+    "pandas": processing.load_and_process_data,
+    "duckdb": duckdb_backend.load_and_process_data,
+    "streaming": processing.stream_and_process_data,
+    # Resolved at call time: needs cache_path for its persisted state.
+    "delta": lambda folder_path, resolve: delta_metrics(folder_path, resolve),
+}
+
+# Bump whenever load_and_process_data changes what it returns, so results
+# persisted by an older version are recomputed instead of served.
+CACHE_VERSION = 3
+
+_memory = {}
+_profiles = {}
+_lock = threading.Lock()
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "duckdb" or importlib.util.find_spec("duckdb")]
+
+
+def dataset_signature(folder_path):
+    folder = Path(folder_path).resolve()
+    files = []
+    for name in INPUT_FILES:
+        stat = (folder / name).stat()
+        files.append((name, stat.st_mtime_ns, stat.st_size))
+    return CACHE_VERSION, str(folder), tuple(files)
+
+
+def discover_datasets(root=Path(__file__).parent):
+    # Every DATA* folder that has all the input files, in name order.
+    return sorted(
+        (path for path in Path(root).glob("DATA*") if all((path / name).is_file() for name in INPUT_FILES)),
+        key=lambda path: path.name,
+    )
+
+
+def cache_path(folder_path, kind="metrics", suffix="pkl"):
+    folder = Path(folder_path).resolve()
+    digest = hashlib.sha1(str(folder).encode('utf-8')).hexdigest()[:12]
+    return CACHE_DIR / f"{folder.name}-{digest}.{kind}.{suffix}"
+
+
+def artifact_path(folder_path, backend="pandas"):
+    # One artifact per backend, so precomputing or viewing a dataset with one
+    # backend does not replace what another backend saved.
+    return cache_path(folder_path, f"metrics-{backend}", "parquet")
+
+
+def delta_metrics(folder_path, resolve=processing.resolve_users_union_find):
+    # The order aggregates persist between recomputes, so orders appended to
+    # orders.parquet as new row groups are the only orders parsed again.
+    aggregates = refresh_aggregates(Path(folder_path) / "orders.parquet", cache_path(folder_path, "orders"))
+    return processing.metrics_from_aggregates(folder_path, aggregates, resolve)
+
+
+def compute_metrics(folder_path, backend="pandas"):
+    # Identity clusters persist across recomputes, so a users.csv that only
+    # gained rows resolves just the new users.
+    identity_path = cache_path(folder_path, "identity")
+    resolve = lambda users: resolve_users_incremental(users, identity_path)
+    return BACKENDS[backend](folder_path, resolve)
+
+
+def _encode(value):
+    if value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return {"timestamp": value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in a metrics artifact")
+
+
+def _decode(obj):
+    if obj.keys() == {"timestamp"}:
+        return pd.Timestamp(obj["timestamp"])
+    return obj
+
+
+def write_artifact(path, signature, result):
+    # A metrics artifact is daily_revenue_df as a Parquet table, with the
+    # dataset signature and every other result entry as JSON in the schema
+    # metadata. A dataset with no orders stores an empty table and null.
+    path = Path(path)
+    if result is None:
+        table, scalars = pa.table({}), None
+    else:
+        table = pa.Table.from_pandas(result["daily_revenue_df"], preserve_index=False)
+        # daily_revenue_df keeps its place in the result as a null marker.
+        scalars = {key: None if key == "daily_revenue_df" else value for key, value in result.items()}
+
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"signature": json.dumps(signature),
+        b"result": json.dumps(scalars, default=_encode),
+    })
+    with atomic_path(path) as tmp:
+        pq.write_table(table, tmp)
+
+
+def read_artifact(path):
+    table = pq.read_table(path)
+    metadata = table.schema.metadata
+    signature = json.loads(metadata[b"signature"])
+    scalars = json.loads(metadata[b"result"], object_hook=_decode)
+    if scalars is None:
+        return signature, None
+
+    result = scalars
+    result["date_range"] = tuple(result["date_range"])
+    result["daily_revenue_df"] = table.to_pandas()
+    return signature, result
+
+
+def _read_disk(folder_path, signature):
+    try:
+        cached_signature, result = read_artifact(artifact_path(folder_path, signature[-1]))
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return False, None
+    return cached_signature == json.loads(json.dumps(signature)), result
+
+
+def _write_disk(folder_path, signature, result):
+    try:
+        write_artifact(artifact_path(folder_path, signature[-1]), signature, result)
+    except (OSError, pa.ArrowException):
+        # A read-only deployment still gets the in-memory cache.
+        pass
+
+
+def is_fresh(folder_path, backend="pandas"):
+    return _read_disk(folder_path, dataset_signature(folder_path) + (backend,))[0]
+
+
+def load_metrics(folder_path, backend="pandas"):
+    signature = dataset_signature(folder_path) + (backend,)
+    key = signature[1], backend
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry and entry[0] == signature:
+            return entry[1]
+
+        with profile(Path(folder_path).name, backend=backend) as current:
+            with stage("read_artifact"):
+                hit, result = _read_disk(folder_path, signature)
+            current.context["source"] = "artifact" if hit else "computed"
+            if not hit:
+                result = compute_metrics(folder_path, backend)
+                with stage("write_artifact"):
+                    _write_disk(folder_path, signature, result)
+
+        _profiles[key] = current
+        _memory[key] = (signature, result)
+        return result
+
+
+def last_profile(folder_path, backend="pandas"):
+    # Stage timings of the last load that went past the in-memory cache.
+    return _profiles.get((str(Path(folder_path).resolve()), backend))
+
+
+def invalidate(folder_path=None):
+    with _lock:
+        if folder_path is None:
+            _memory.clear()
+            _profiles.clear()
+            paths = [path for pattern in ("*.pkl", "*.parquet") for path in CACHE_DIR.glob(pattern)]
+        else:
+            folder = str(Path(folder_path).resolve())
+            for backend in BACKENDS:
+                _memory.pop((folder, backend), None)
+                _profiles.pop((folder, backend), None)
+            paths = [artifact_path(folder_path, backend) for backend in BACKENDS]
+            paths += [cache_path(folder_path, "identity"), cache_path(folder_path, "orders")]
+
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,60 @@
+import pyarrow.parquet as pq
+
+from persistence import PickledState
+from processing import STREAM_BATCH_SIZE, aggregate_batches
+from profiling import stage
+from schema import iter_orders
+
+
+def row_group_fingerprints(path):
+    # What identifies a row group without reading its data: row count, byte
+    # sizes and offsets of every column chunk, and the min/max statistics
+    # where the writer stored them. A file that was rewritten rather than
+    # appended to changes these for the row groups that differ.
+    metadata = pq.ParquetFile(path).metadata
+    fingerprints = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        columns = []
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            stats = chunk.statistics
+            bounds = (stats.min, stats.max) if stats is not None and stats.has_min_max else None
+            columns.append((chunk.data_page_offset, chunk.total_compressed_size, bounds))
+        fingerprints.append((row_group.num_rows, row_group.total_byte_size, tuple(columns)))
+    return fingerprints
+
+
+class OrderState(PickledState):
+    # Persisted partial aggregates of orders.parquet plus the watermark they
+    # cover: the fingerprints of the row groups already folded in. Orders
+    # appended as new row groups are aggregated on their own and merged in.
+
+    def __init__(self):
+        self.row_groups = []
+        self.aggregates = None
+
+
+def refresh_aggregates(orders_path, state_path, batch_size=STREAM_BATCH_SIZE):
+    # Only row groups past the stored watermark are read and parsed. If any
+    # row group the state already covers has changed (the file was rewritten,
+    # not appended to), the state is rebuilt from the whole file.
+    fingerprints = row_group_fingerprints(orders_path)
+    state = OrderState.load(state_path)
+    known = len(state.row_groups)
+    if state.aggregates is None or fingerprints[:known] != state.row_groups:
+        state, known = OrderState(), 0
+
+    new_groups = list(range(known, len(fingerprints)))
+    if not new_groups:
+        return state.aggregates
+
+    with stage("new_orders", rows=sum(fingerprints[i][0] for i in new_groups)):
+        state.aggregates = aggregate_batches(iter_orders(orders_path, batch_size, new_groups), state.aggregates)
+    state.row_groups = fingerprints
+    with stage("save_state"):
+        try:
+            state.save(state_path)
+        except OSError:
+            pass
+    return state.aggregates
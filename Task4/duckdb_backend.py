@@ -0,0 +1,158 @@
+from pathlib import Path
+
+from metrics import MetricContext, OrderAggregates, compute_metrics
+from processing import clean_prices, layout_formats, load_books, parse_dates_by_layout, resolve_users_union_find
+from profiling import stage
+from schema import project_books
+
+# pd.read_csv's default missing-value markers, so users.csv reads the same way
+# in both backends (users.csv writes missing addresses as "NULL").
+PANDAS_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+
+def sql_string(value):
+    # A SQL string literal; view definitions cannot take bound parameters.
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def connect(folder_path):
+    # Input files become views, so every query streams over them with DuckDB's
+    # own readers and thread pool instead of materializing them in pandas.
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("The DuckDB backend needs duckdb: pip install duckdb") from None
+
+    folder_path = Path(folder_path)
+    con = duckdb.connect()
+    con.execute(f"CREATE VIEW orders AS SELECT * FROM read_parquet({sql_string(folder_path / 'orders.parquet')})")
+    con.execute(f"CREATE VIEW users AS SELECT * FROM read_csv({sql_string(folder_path / 'users.csv')}, header = true, "
+                f"nullstr = {PANDAS_NA_VALUES!r}, "
+                "types = {'id': 'BIGINT', 'name': 'VARCHAR', 'address': 'VARCHAR', 'phone': 'VARCHAR', "
+                "'email': 'VARCHAR'})")
+    con.register('books', project_books(load_books(folder_path / "books.yaml")))
+    return con
+
+
+def timestamp_sql(layout):
+    # parse_dates_by_layout's explicit formats for one layout as a SQL
+    # expression over `normalized`: first format that parses wins, and two
+    # digit years outside 2000-2068 are left to the fallback as in pandas.
+    tries = []
+    for fmt in layout_formats(layout):
+        parsed = f"try_strptime(normalized, {sql_string(fmt)})"
+        if '%y' in fmt:
+            parsed = f"CASE WHEN year({parsed}) BETWEEN 2000 AND 2068 THEN {parsed} END"
+        tries.append(parsed)
+    return f"COALESCE({', '.join(tries)})" if tries else "NULL::TIMESTAMP"
+
+
+def register_lookups(con):
+    # Prices are messy strings with few distinct values; they are parsed once
+    # per value with the pandas parser, so both backends agree exactly, and
+    # joined back in SQL.
+    prices = con.sql("SELECT DISTINCT unit_price FROM orders WHERE unit_price IS NOT NULL").df()
+    prices['usd'] = clean_prices(prices['unit_price'])
+    con.register('price_lookup', prices)
+
+    # Timestamps are nearly all distinct, so they stay in DuckDB: the same
+    # normalization and layouts as parse_dates_by_layout, with each layout's
+    # formats applied by strptime. Only the layouts are fetched, plus the few
+    # values no format accepts, which go through the pandas parser.
+    con.execute(r'''
+        CREATE TEMP VIEW timestamp_layouts AS
+        SELECT
+            timestamp,
+            normalized,
+            regexp_replace(regexp_replace(normalized, '[0-9]', '0', 'g'), '[A-Za-z]', 'a', 'g') AS layout
+        FROM (
+            SELECT
+                timestamp,
+                regexp_replace(regexp_replace(replace(replace(timestamp, ';', ' '), ',', ' '),
+                               '\s+', ' ', 'g'), '^ | $', '', 'g') AS normalized
+            FROM (SELECT DISTINCT timestamp FROM orders WHERE timestamp IS NOT NULL)
+        )
+    ''')
+    layouts = [row[0] for row in con.sql("SELECT DISTINCT layout FROM timestamp_layouts").fetchall()]
+    cases = " ".join(f"WHEN {sql_string(layout)} THEN {timestamp_sql(layout)}" for layout in layouts)
+    con.execute(f'''
+        CREATE TEMP TABLE timestamp_lookup AS
+        SELECT timestamp, {f"CASE layout {cases} END" if cases else "NULL::TIMESTAMP"} AS date_obj
+        FROM timestamp_layouts
+    ''')
+
+    leftover = con.sql("SELECT timestamp FROM timestamp_lookup WHERE date_obj IS NULL").df()
+    if len(leftover):
+        leftover['date_obj'] = parse_dates_by_layout(leftover['timestamp'])
+        con.register('timestamp_leftover', leftover)
+        con.execute('''
+            UPDATE timestamp_lookup t
+            SET date_obj = l.date_obj
+            FROM timestamp_leftover l
+            WHERE t.timestamp = l.timestamp
+        ''')
+
+    con.execute('''
+        CREATE TEMP VIEW paid_orders AS
+        SELECT
+            o.user_id,
+            o.book_id,
+            o.quantity,
+            t.date_obj,
+            o.quantity * COALESCE(p.usd, 0.0) AS paid_price
+        FROM orders o
+        LEFT JOIN price_lookup p ON o.unit_price = p.unit_price
+        LEFT JOIN timestamp_lookup t ON o.timestamp IS NOT DISTINCT FROM t.timestamp
+    ''')
+
+
+def query_aggregates(con):
+    by_date = con.sql('''
+        SELECT date_obj, SUM(paid_price) AS paid_price
+        FROM paid_orders
+        WHERE date_obj IS NOT NULL
+        GROUP BY date_obj
+        ORDER BY date_obj
+    ''').df().set_index('date_obj')['paid_price']
+    by_user = con.sql('''
+        SELECT user_id, SUM(paid_price) AS paid_price
+        FROM paid_orders
+        GROUP BY user_id
+        ORDER BY user_id
+    ''').df().set_index('user_id')['paid_price']
+    by_book = con.sql('''
+        SELECT book_id, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM paid_orders
+        GROUP BY book_id
+        ORDER BY book_id
+    ''').df().set_index('book_id')['quantity']
+    total_orders = con.sql("SELECT COUNT(*) FROM orders").fetchone()[0]
+    return OrderAggregates(by_date, by_user, by_book, total_orders)
+
+
+def load_and_process_data(folder_path, resolve=resolve_users_union_find, metrics=None):
+    with stage("connect"):
+        con = connect(folder_path)
+    try:
+        if con.sql("SELECT COUNT(*) FROM orders").fetchone()[0] == 0:
+            return None
+
+        with stage("lookups"):
+            register_lookups(con)
+        with stage("aggregate") as record:
+            aggregates = query_aggregates(con)
+            record['rows'] = aggregates.total_orders
+        with stage("read_users") as record:
+            users = con.sql("SELECT id, address, phone, email FROM users").df()
+            record['rows'] = len(users)
+        books = con.sql("SELECT id, author FROM books").df()
+    finally:
+        con.close()
+
+    with stage("resolve_users", rows=len(users)):
+        user_map, grouped_ids = resolve(users)
+    with stage("metrics"):
+        return compute_metrics(MetricContext(aggregates, books, user_map, grouped_ids), metrics)
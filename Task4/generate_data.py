@@ -0,0 +1,313 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+# Seeded generator for DATA-style folders of any size. The quirks mirror what
+# DATA1-3 contain and the parsers in processing.py handle: Ruby-symbol YAML
+# keys with junk years/publishers, ~200 timestamp layouts, $/€ prices in a
+# dozen spellings, blank/"NULL" addresses, and users whose email, phone or
+# address repeat under another id.
+
+DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+FIRST_NAMES = ["Hoyt", "Marco", "Yukiko", "Dulce", "Ted", "Irmgard", "Makeda", "Randall", "Jorge", "Carolyne",
+               "Heath", "Gino", "Haydee", "Vannessa", "Amos", "Chantelle", "Jenniffer", "Awilda", "Susanna",
+               "Justin", "Jim", "Gerda", "Jeffrey", "Asa", "Hershel", "Modesto", "Trula", "Coy", "Keeley", "Lela"]
+LAST_NAMES = ["Carter", "Kulas", "Becker", "Welch", "Aufderhar", "Erdman", "Schmeler", "Schowalter", "Olson",
+              "West", "Stiedemann", "Larson", "Price", "Schaden", "McLaughlin", "Greenholt", "Sauer",
+              "Christiansen", "MacGyver", "Renner", "Torphy", "Cassin", "Rogahn", "Treutel", "Denesik", "Bosco",
+              "Streich", "Hand", "Emard", "O'Reilly"]
+PREFIXES = ["", "", "", "", "Dr. ", "Mrs. ", "Rev. ", "Sen. ", "Miss "]
+SUFFIXES = ["", "", "", "", "", " Jr.", " Sr.", " Esq.", " Ret."]
+STREETS = ["Ashlyn Wells", "Bechtelar Ferry", "Annette Islands", "Reichel Island", "Arnold Turnpike",
+           "Hane Land", "Beier Forge", "Mitsuko Plaza", "Parisian Fields", "Quigley Trafficway", "Ismael Locks"]
+CITIES = ["Effertzstad", "Lincolnhaven", "South Andreville", "Swaniawskichester", "Cummerataview",
+          "Nicolabury", "Cruickshankfurt", "Lake Cassibury", "Port Serafina", "New Tyler", "South Erniehaven"]
+STATES = ["ID", "KS", "AZ", "VA", "HI", "CA", "NE", "RI", "TX", "FL", "IL"]
+DOMAINS = ["example", "test"]
+TITLE_WORDS = ["Yellow", "Meads", "Asphodel", "Eternity", "Eyeless", "Gaza", "Duty", "Warfare", "Generals",
+               "Conquer", "Command", "Black", "Time", "Darkling", "Plain", "Golden", "Bowl", "Sleep", "Death"]
+GENRES = ["Classic", "Short story", "Biography/Autobiography", "Crime/Detective", "Metafiction", "Fantasy",
+          "Horror", "Mystery", "Science fiction", "Poetry"]
+PUBLISHERS = ["Mainstream Publishing", "Vintage Books", "Pavilion Books", "Adis International",
+              "Emerald Group Publishing", "Hachette Livre", "Penguin Group"]
+# Placeholders the YAML files use for a missing year or publisher.
+BLANKS = [None, "", " ", "\t", "NULL", "-"]
+
+# Date and time halves of the separated layouts. "%d-%b-%Y" is listed twice so
+# abbreviated month names outnumber full ones; dotted and month-name dates
+# sometimes have the day space-padded instead of zero-padded.
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%y", "%d.%m.%Y", "%d-%b-%Y", "%d-%b-%Y", "%d-%B-%Y"]
+TIME_FORMATS = ["%H:%M:%S", "%H:%M", "%I:%M:%S %p"]
+SEPARATORS = [" ", ",", ", ", ";", "; "]
+MERIDIEMS = {"AM": ["AM", "am", "A.M."], "PM": ["PM", "pm", "P.M."]}
+
+QUANTITIES = [1, 2, 3, 4, 5]
+QUANTITY_WEIGHTS = [0.705, 0.164, 0.064, 0.034, 0.033]
+CENTS = [0, 25, 50, 75, 99]
+AUTHOR_COUNT_WEIGHTS = [0.70, 0.18, 0.09, 0.02, 0.01]
+
+START = np.datetime64('2024-01-01T00:00:00', 's')
+SPAN = int((np.datetime64('2026-01-01T00:00:00', 's') - START) / np.timedelta64(1, 's'))
+
+
+def pick(rng, options, size, p=None):
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=size, p=p)]
+
+
+def person_names(rng, size):
+    return (pick(rng, PREFIXES, size) + pick(rng, FIRST_NAMES, size) + " "
+            + pick(rng, LAST_NAMES, size) + pick(rng, SUFFIXES, size))
+
+
+def addresses(rng, serial):
+    # The serial number keeps every address unique unless it is copied on purpose.
+    size = len(serial)
+    units = pick(rng, ["", "Apt. ", "Suite "], size)
+    units = np.where(units == "", "", units + rng.integers(100, 1000, size).astype(str) + " ")
+    return (units + (1000 + serial).astype(str) + " " + pick(rng, STREETS, size) + ", " + pick(rng, CITIES, size)
+            + ", " + pick(rng, STATES, size) + " " + rng.integers(10000, 100000, size).astype(str).astype(object))
+
+
+def format_phones(rng, numbers):
+    digits = pd.Series(numbers).astype(str).str.zfill(10)
+    area, exchange, line = digits.str[:3], digits.str[3:6], digits.str[6:]
+    styles = rng.integers(0, 4, len(numbers))
+    formatted = np.select(
+        [styles == 0, styles == 1, styles == 2],
+        [area + "." + exchange + "." + line, area + "-" + exchange + "-" + line, area + " " + exchange + " " + line],
+        "(" + area + ") " + exchange + "-" + line,
+    )
+    return formatted.astype(object)
+
+
+def generate_users(rng, count, duplicate_rate, first_id):
+    # Each row is a new person, or (with probability duplicate_rate) an alias
+    # of an earlier person that reuses one to three of their email, phone and
+    # address. Reused emails may change case and reused phones their format,
+    # which the identity keys normalize away.
+    serial = np.arange(count)
+    first, last = pick(rng, FIRST_NAMES, count), pick(rng, LAST_NAMES, count)
+    users = pd.DataFrame({
+        'id': first_id + rng.permutation(count),
+        'name': pick(rng, PREFIXES, count) + first + " " + last + pick(rng, SUFFIXES, count),
+        'address': addresses(rng, serial),
+        # i * 1000003 mod 8e9 is a bijection, so phone numbers never repeat by chance.
+        'phone_number': 2_000_000_000 + (serial * 1_000_003) % 8_000_000_000,
+        'email': (pd.Series(first).str.lower() + "." + pd.Series(last).str.lower().str.replace("'", "")
+                  + serial.astype(str) + "@" + pd.Series(last).str.lower().str.replace("'", "") + "."
+                  + pick(rng, DOMAINS, count)).to_numpy(),
+    })
+
+    alias = rng.random(count) < duplicate_rate
+    alias[0] = False
+    rows = np.flatnonzero(alias)
+    # The person an alias copies is always an earlier original row.
+    originals = np.flatnonzero(~alias)
+    source = originals[rng.integers(0, np.searchsorted(originals, rows), len(rows))]
+    shared = rng.random((len(rows), 3)) < 0.6
+    unshared = np.flatnonzero(~shared.any(axis=1))
+    shared[unshared, rng.integers(0, 3, len(unshared))] = True
+    for column, share in zip(['email', 'phone_number', 'address'], shared.T):
+        users.loc[rows[share], column] = users[column].to_numpy()[source[share]]
+    shouted = rows[shared[:, 0] & (rng.random(len(rows)) < 0.2)]
+    users.loc[shouted, 'email'] = users.loc[shouted, 'email'].str.upper()
+    same_name = rows[rng.random(len(rows)) < 0.5]
+    users.loc[same_name, 'name'] = users['name'].to_numpy()[source[np.isin(rows, same_name)]]
+
+    users['phone'] = format_phones(rng, users.pop('phone_number').to_numpy())
+    missing = rng.random(count)
+    users.loc[missing < 0.025, 'address'] = ""
+    users.loc[(missing >= 0.025) & (missing < 0.05), 'address'] = "NULL"
+    return users[['id', 'name', 'address', 'phone', 'email']].sample(frac=1, random_state=rng.integers(2**32))
+
+
+def generate_books(rng, count, first_id):
+    authors = person_names(rng, max(count // 2, 1))
+    records = []
+    ids = first_id + rng.permutation(count)
+    author_counts = rng.choice(len(AUTHOR_COUNT_WEIGHTS), size=count, p=AUTHOR_COUNT_WEIGHTS) + 1
+    titles = (pick(rng, ["The ", "", "", "From "], count) + pick(rng, TITLE_WORDS, count) + " "
+              + pick(rng, TITLE_WORDS, count) + pick(rng, ["", " of " + TITLE_WORDS[0], ": Remastered"], count))
+    for book_id, title, n_authors in zip(ids.tolist(), titles, author_counts.tolist()):
+        names = rng.choice(authors, size=n_authors, replace=False)
+        year = int(rng.integers(1850, 2025))
+        publisher = str(rng.choice(PUBLISHERS))
+        if rng.random() < 0.015:
+            year = rng.choice(BLANKS + ["0"])
+        if rng.random() < 0.015:
+            publisher = rng.choice(BLANKS)
+        records.append({':id': book_id, ':title': str(title), ':author': ", ".join(names),
+                        ':genre': str(rng.choice(GENRES)), ':publisher': publisher, ':year': year})
+    return records
+
+
+def format_timestamps(rng, seconds):
+    # One layout per row: ISO with a "T" (with and without milliseconds),
+    # ctime, or a date and a time in either order joined by a separator.
+    stamps = pd.Series(START + seconds.astype('timedelta64[s]'))
+    stamps += pd.to_timedelta(rng.integers(0, 1000, len(seconds)), unit='ms')
+    out = np.empty(len(seconds), dtype=object)
+
+    kind = rng.choice(4, size=len(seconds), p=[0.075, 0.075, 0.012, 0.838])
+    out[kind == 0] = stamps[kind == 0].dt.strftime('%Y-%m-%dT%H:%M:%S').to_numpy()
+    out[kind == 1] = stamps[kind == 1].dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-3].to_numpy()
+    ctime = stamps[kind == 2].dt.strftime('%a %b %d %H:%M:%S %Y')
+    out[kind == 2] = ctime.str.replace(r'^(\w{3} \w{3}) 0', r'\1  ', regex=True).to_numpy()
+
+    rows = np.flatnonzero(kind == 3)
+    date_format = rng.integers(0, len(DATE_FORMATS), len(rows))
+    time_format = rng.integers(0, len(TIME_FORMATS), len(rows))
+    separator = pick(rng, SEPARATORS, len(rows))
+    time_first = rng.random(len(rows)) < 0.5
+    # Dotted dates only ever come date first, with a 24-hour time.
+    dotted = date_format == DATE_FORMATS.index("%d.%m.%Y")
+    time_format[dotted] = 0
+    time_first[dotted] = False
+    padded = rng.random(len(rows)) < 0.3
+    meridiem_style = rng.integers(0, 3, len(rows))
+
+    for d, t in np.ndindex(len(DATE_FORMATS), len(TIME_FORMATS)):
+        group = (date_format == d) & (time_format == t)
+        if not group.any():
+            continue
+        when = stamps.iloc[rows[group]]
+        date = when.dt.strftime(DATE_FORMATS[d])
+        if DATE_FORMATS[d].startswith('%d.') or DATE_FORMATS[d].startswith('%d-'):
+            date = date.where(~padded[group], date.str.replace(r'^0', ' ', regex=True))
+        if d == 3:
+            date = date.where(rng.random(group.sum()) < 0.95, date.str.upper())
+        clock = when.dt.strftime(TIME_FORMATS[t])
+        if t == 2:
+            suffix = clock.str[-2:]
+            styles = meridiem_style[group]
+            for marker, variants in MERIDIEMS.items():
+                for style, variant in enumerate(variants):
+                    hit = (suffix == marker).to_numpy() & (styles == style)
+                    clock[hit] = clock[hit].str[:-2] + variant
+        if d == 2 and t == 0:
+            clock = clock.where(~padded[group], clock.str.replace(r'^0', ' ', regex=True))
+        first = np.where(time_first[group], clock, date)
+        second = np.where(time_first[group], date, clock)
+        out[rows[group]] = first + np.where(d == 2, " ", separator[group]) + second
+    return out
+
+
+def format_prices(rng, size):
+    # Dollar amounts in a dozen spellings; about a third are euros.
+    whole = rng.integers(5, 100, size)
+    cents = pick(rng, CENTS, size).astype(int)
+    euro = rng.random(size) < 0.35
+    symbol = np.where(euro, pick(rng, ["€", "EUR"], size), pick(rng, ["$", "USD"], size))
+    style = rng.choice(5, size=size, p=[0.72, 0.12, 0.07, 0.05, 0.04])
+    # "12.5" only for whole tens of cents, "12." and "12" only for whole dollars.
+    style[((style == 1) & (cents % 10 != 0)) | (np.isin(style, [2, 3]) & (cents != 0))] = 0
+
+    two = whole.astype(str) + "." + pd.Series(cents).astype(str).str.zfill(2).to_numpy()
+    one = whole.astype(str) + "." + (cents // 10).astype(str)
+    amount = np.select([style == 1, style == 2, style == 3], [one, whole.astype(str) + ".", whole.astype(str)], two)
+
+    space = pick(rng, ["", " "], size)
+    prefix = rng.random(size) < 0.5
+    text = np.where(prefix, symbol + space + amount, amount + space + symbol).astype(object)
+
+    # "$12¢50" / "12$50¢" spellings, only with the one-character symbols.
+    cent_sign = (style == 4) & np.isin(symbol, ["$", "€"])
+    cents_text = pd.Series(cents).astype(str).str.zfill(2).to_numpy()
+    text[cent_sign] = np.where(
+        prefix[cent_sign],
+        symbol[cent_sign] + whole[cent_sign].astype(str) + "¢" + cents_text[cent_sign],
+        whole[cent_sign].astype(str) + symbol[cent_sign] + cents_text[cent_sign] + "¢",
+    )
+    return text
+
+
+ORDER_SCHEMA = pa.schema([
+    ('id', pa.int64()), ('user_id', pa.int64()), ('book_id', pa.int64()), ('quantity', pa.int32()),
+    ('unit_price', pa.string()), ('timestamp', pa.string()), ('shipping', pa.string()),
+])
+
+_worker = {}
+
+
+def _init_orders(user_ids, book_ids, book_weights):
+    _worker.update(user_ids=user_ids, book_ids=book_ids, book_weights=book_weights)
+
+
+def generate_orders(seed, first_id, size):
+    rng = np.random.default_rng(seed)
+    user_ids, book_ids = _worker['user_ids'], _worker['book_ids']
+    shipping = addresses(rng, rng.integers(0, 10**6, size)).astype(object)
+    blank = rng.random(size)
+    shipping[blank < 0.25] = None
+    shipping[(blank >= 0.25) & (blank < 0.5)] = "NULL"
+    shipping[(blank >= 0.5) & (blank < 0.75)] = ""
+
+    return pa.table({
+        'id': first_id + rng.permutation(size),
+        'user_id': user_ids[rng.integers(0, len(user_ids), size)],
+        'book_id': book_ids[rng.choice(len(book_ids), size=size, p=_worker['book_weights'])],
+        'quantity': rng.choice(QUANTITIES, size=size, p=QUANTITY_WEIGHTS).astype(np.int32),
+        'unit_price': format_prices(rng, size),
+        'timestamp': format_timestamps(rng, rng.integers(0, SPAN, size)),
+        'shipping': shipping,
+    }, schema=ORDER_SCHEMA)
+
+
+def generate_dataset(out_dir, orders, users=None, books=None, duplicate_rate=0.05, seed=0,
+                     chunk_size=500_000, workers=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    users = users or max(orders // 3, 1)
+    books = books or max(min(orders // 15, 100_000), 1)
+    users_seed, books_seed, orders_seed = np.random.SeedSequence(seed).spawn(3)
+
+    user_table = generate_users(np.random.default_rng(users_seed), users, duplicate_rate, first_id=44_000)
+    user_table.to_csv(out_dir / "users.csv", index=False)
+
+    book_records = generate_books(np.random.default_rng(books_seed), books, first_id=18_000)
+    with open(out_dir / "books.yaml", 'w', encoding='utf-8') as f:
+        yaml.dump(book_records, f, Dumper=DUMPER, explicit_start=True, sort_keys=False, allow_unicode=True)
+
+    # A few bestsellers, a long tail.
+    book_ids = np.array([record[':id'] for record in book_records])
+    book_weights = 1.0 / np.arange(1, len(book_ids) + 1) ** 0.6
+    book_weights /= book_weights.sum()
+
+    # Each chunk has its own child seed, so the output does not depend on the
+    # number of workers; chunks are written in order, one row group each.
+    starts = range(0, orders, chunk_size)
+    seeds = orders_seed.spawn(len(starts))
+    sizes = [min(chunk_size, orders - start) for start in starts]
+    first_ids = [62_000 + start for start in starts]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_orders,
+                             initargs=(user_table['id'].to_numpy(), book_ids, book_weights)) as pool, \
+            pq.ParquetWriter(out_dir / "orders.parquet", ORDER_SCHEMA) as writer:
+        for table in pool.map(generate_orders, seeds, first_ids, sizes):
+            writer.write_table(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic DATA folder (books.yaml, orders.parquet, users.csv).")
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--users", type=int, help="default: orders / 3")
+    parser.add_argument("--books", type=int, help="default: orders / 15, at most 100000")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="share of users that alias an earlier user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="orders per worker task / row group")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate_dataset(args.out_dir, args.orders, args.users, args.books, args.duplicate_rate, args.seed,
+                     args.chunk_size, args.workers)
+    print(f"Wrote {args.orders:,} orders to {args.out_dir} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+from persistence import PickledState
+from processing import identity_keys
+from profiling import stage
+
+KEY_COLUMNS = ('email', 'phone', 'address')
+HASH_MASK = (1 << 64) - 1
+
+
+def contact_hashes(users_df):
+    # (ids, one uint64 per id) over the raw email/phone/address values of all
+    # the id's rows, to notice users whose contact fields were edited in place.
+    # Row hashes are summed (wrapping), so row order within an id is ignored.
+    row_hashes = pd.util.hash_pandas_object(users_df[list(KEY_COLUMNS)], index=False).to_numpy()
+    codes, ids = pd.factorize(users_df['id'], sort=True)
+    hashes = np.zeros(len(ids), dtype=np.uint64)
+    np.add.at(hashes, codes, row_hashes)
+    return np.asarray(ids), hashes
+
+
+class IdentityIndex(PickledState):
+    # Persistent union-find over user ids. Normalized email/phone/address keys
+    # point at the first user seen with them, so a new batch only touches its
+    # own rows and the clusters they join. mapping and grouped_ids follow the
+    # resolve_users contract (canonical id = smallest id in the cluster) and
+    # are updated in place on every merge. id_hashes holds contact_hashes()
+    # of every user's rows added so far. A repeated id is one user: the keys
+    # of all its rows join its cluster, as in resolve_users_union_find.
+
+    def __init__(self):
+        self.parent = {}
+        self.members = {}
+        self.key_owner = {}
+        self.mapping = {}
+        self.grouped_ids = {}
+        self.id_hashes = {}
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def find(self, uid):
+        root = uid
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[uid] != root:
+            self.parent[uid], uid = root, self.parent[uid]
+        return root
+
+    def _add(self, uid):
+        if uid in self.parent:
+            return False
+        self.parent[uid] = uid
+        self.members[uid] = self.grouped_ids[uid] = [uid]
+        self.mapping[uid] = uid
+        return True
+
+    def _union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if len(self.members[root_a]) < len(self.members[root_b]):
+            root_a, root_b = root_b, root_a
+
+        group_a, group_b = self.members[root_a], self.members.pop(root_b)
+        merged = sorted(group_a + group_b)
+        canonical = merged[0]
+
+        self.parent[root_b] = root_a
+        self.members[root_a] = merged
+        del self.grouped_ids[group_a[0]], self.grouped_ids[group_b[0]]
+        self.grouped_ids[canonical] = merged
+        for uid in (group_b if canonical == group_a[0] else group_a):
+            self.mapping[uid] = canonical
+
+    def add_users(self, users_df):
+        users_df = users_df.reset_index(drop=True)
+        ids = users_df['id'].tolist()
+        added = sum(self._add(uid) for uid in set(ids))
+        # Rows of an id already indexed add to its hash like they would have
+        # in one batch.
+        for uid, id_hash in zip(*(a.tolist() for a in contact_hashes(users_df))):
+            self.id_hashes[uid] = (self.id_hashes.get(uid, 0) + id_hash) & HASH_MASK
+
+        for column, key in zip(KEY_COLUMNS, identity_keys(users_df)):
+            for row, value in zip(key.index.tolist(), key.tolist()):
+                uid = ids[row]
+                owner = self.key_owner.setdefault((column, value), uid)
+                if owner != uid:
+                    self._union(uid, owner)
+        return added
+
+    @classmethod
+    def load(cls, path):
+        index = super().load(path)
+        # Indexes saved before id_hashes existed cannot detect edits.
+        return index if hasattr(index, 'id_hashes') else cls()
+
+
+def resolve_users_incremental(users_df, index_path):
+    # Only ids the stored index has not seen are resolved. If ids disappeared,
+    # or a known user's email/phone/address no longer matches what was
+    # indexed, the clusters may be stale and the index is rebuilt from scratch.
+    with stage("load_index"):
+        index = IdentityIndex.load(index_path)
+    # int64, not the id column's dtype: the stored ids may not fit a narrower one.
+    known_ids = np.fromiter(index.id_hashes, dtype=np.int64, count=len(index.id_hashes))
+    known_hashes = np.fromiter(index.id_hashes.values(), dtype=np.uint64, count=len(index.id_hashes))
+    new_users = users_df[~users_df['id'].isin(known_ids).to_numpy()]
+
+    # Every row of a known id is hashed, so a row added to or dropped from a
+    # known user also counts as a change.
+    ids, hashes = contact_hashes(users_df)
+    seen = np.isin(ids, known_ids)
+    stored = known_hashes[pd.Index(known_ids).get_indexer(ids[seen])]
+    changed = (stored != hashes[seen]).any()
+
+    if changed or len(index) + new_users['id'].nunique() != users_df['id'].nunique():
+        index = IdentityIndex()
+        new_users = users_df
+
+    if len(new_users):
+        with stage("add_users", rows=len(new_users)):
+            index.add_users(new_users)
+        with stage("save_index"):
+            try:
+                index.save(index_path)
+            except OSError:
+                pass
+
+    return index.mapping, index.grouped_ids
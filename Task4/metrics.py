@@ -0,0 +1,150 @@
+from functools import cached_property
+
+import pandas as pd
+
+# Registered metric functions, in result order. Each takes a MetricContext and
+# returns a dict of result entries; register new ones with @metric.
+METRICS = {}
+
+
+def metric(func):
+    METRICS[func.__name__] = func
+    return func
+
+
+def normalize_authors(auth_str):
+    if not isinstance(auth_str, str):
+        return "Unknown"
+    parts = sorted([a.strip() for a in auth_str.split(',')])
+    return ", ".join(parts)
+
+
+class OrderAggregates:
+    # The only per-order work: one grouped aggregation per key. Everything the
+    # dashboard shows is derived from these much smaller series. Users and
+    # books are kept on their raw ids so identity and author mapping happen
+    # after aggregation, on one row per id instead of one per order.
+
+    def __init__(self, by_date, by_user, by_book, total_orders):
+        self.by_date = by_date
+        self.by_user = by_user
+        self.by_book = by_book
+        self.total_orders = total_orders
+
+    @classmethod
+    def from_orders(cls, orders):
+        return cls(
+            by_date=orders.groupby('date_obj')['paid_price'].sum(),
+            by_user=orders.groupby('user_id', dropna=False)['paid_price'].sum(),
+            by_book=orders.groupby('book_id', dropna=False)['quantity'].sum(),
+            total_orders=len(orders),
+        )
+
+    @classmethod
+    def combine(cls, parts):
+        # Partial aggregates from disjoint slices of the orders (e.g. Parquet
+        # batches) sum key by key into the aggregate of the whole.
+        def merged(attr):
+            series = pd.concat([getattr(part, attr) for part in parts])
+            return series.groupby(level=0, dropna=False).sum()
+
+        return cls(
+            by_date=merged('by_date'),
+            by_user=merged('by_user'),
+            by_book=merged('by_book'),
+            total_orders=sum(part.total_orders for part in parts),
+        )
+
+
+class MetricContext:
+    def __init__(self, aggregates, books, user_map, grouped_ids):
+        self.aggregates = aggregates
+        self.books = books
+        self.user_map = user_map
+        self.grouped_ids = grouped_ids
+
+    @cached_property
+    def by_day(self):
+        by_date = self.aggregates.by_date
+        by_day = by_date.groupby(by_date.index.normalize()).sum()
+        by_day.index = by_day.index.strftime('%Y-%m-%d')
+        return by_day
+
+    @cached_property
+    def author_sales(self):
+        # The single join: per-book quantities against the books table.
+        by_book = self.aggregates.by_book.rename('quantity').reset_index()
+        merged = by_book.merge(self.books, left_on='book_id', right_on='id', how='left')
+        if 'author' not in merged.columns:
+            merged['author'] = None
+        merged['author_set'] = merged['author'].map(normalize_authors)
+        return merged.groupby('author_set')['quantity'].sum()
+
+    @cached_property
+    def user_spending(self):
+        by_user = self.aggregates.by_user
+        real_ids = by_user.index.map(lambda uid: self.user_map.get(uid, uid))
+        return by_user.groupby(real_ids).sum()
+
+
+@metric
+def top_days(ctx):
+    top_5_days = ctx.by_day.sort_values(ascending=False).head(5)
+    return {
+        "top_5_days": top_5_days.index.tolist(),
+        "top_5_days_values": top_5_days.values.tolist(),
+    }
+
+
+@metric
+def unique_users(ctx):
+    return {"unique_users": len(set(ctx.user_map.values()))}
+
+
+@metric
+def author_sets(ctx):
+    return {"unique_authors": ctx.author_sales.index.nunique()}
+
+
+@metric
+def top_author(ctx):
+    author_sales = ctx.author_sales
+    if author_sales.empty:
+        return {"top_author": "No Data", "top_author_sales": 0}
+    return {"top_author": author_sales.idxmax(), "top_author_sales": author_sales.max()}
+
+
+@metric
+def top_spender(ctx):
+    user_spending = ctx.user_spending
+    if user_spending.empty:
+        return {"top_buyer_ids": [], "top_spender_amount": 0}
+    top_spender_real_id = user_spending.idxmax()
+    return {
+        "top_buyer_ids": ctx.grouped_ids.get(top_spender_real_id, [top_spender_real_id]),
+        "top_spender_amount": user_spending.max(),
+    }
+
+
+@metric
+def daily_revenue(ctx):
+    daily_rev_sorted = ctx.aggregates.by_date.reset_index()
+    daily_rev_sorted.columns = ['Date', 'Revenue']
+    return {"daily_revenue_df": daily_rev_sorted}
+
+
+@metric
+def totals(ctx):
+    by_date = ctx.aggregates.by_date
+    return {
+        "total_revenue": ctx.aggregates.by_user.sum(),
+        "total_orders": ctx.aggregates.total_orders,
+        "date_range": (by_date.index.min(), by_date.index.max()),
+    }
+
+
+def compute_metrics(ctx, names=None):
+    result = {}
+    for name in (names or METRICS):
+        result.update(METRICS[name](ctx))
+    return result
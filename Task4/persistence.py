@@ -0,0 +1,38 @@
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_path(path):
+    # A temporary file next to `path` to write to; it replaces `path` only if
+    # the block finishes, so readers never see a half-written file.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class PickledState:
+    # State kept between runs as a pickle. load() gives a fresh instance when
+    # the file is missing, unreadable or holds something else, so a bad cache
+    # only costs a rebuild.
+
+    def save(self, path):
+        with atomic_path(path) as tmp, open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return cls()
+        return state if isinstance(state, cls) else cls()
@@ -0,0 +1,431 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yaml
+
+from metrics import MetricContext, OrderAggregates, compute_metrics
+from persistence import atomic_path
+from profiling import stage
+from schema import iter_orders, project_books, read_orders, read_users
+
+
+# LibYAML's C loader when PyYAML was built with it; same results, ~10x faster.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def parse_books_yaml(filepath):
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    content = re.sub(r':(\w+)', r'\1', content)
+    # A broken file is an error for the caller, not an empty catalogue that
+    # would silently zero every book metric (and be cached as the sidecar).
+    try:
+        data = yaml.load(content, Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        raise ValueError(f"Error parsing YAML {filepath}: {e}") from e
+    return pd.DataFrame(data)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_books(filepath):
+    # books.yaml is parsed once and cached as a Parquet sidecar next to it.
+    # The sidecar is trusted while the YAML's mtime and size match; otherwise
+    # the content hash decides whether a re-parse is needed.
+    path = Path(filepath)
+    sidecar = path.with_name(path.name + '.parquet')
+    stat = path.stat()
+
+    try:
+        meta = pq.read_schema(sidecar).metadata or {}
+        if int(meta[b'size']) == stat.st_size and (
+                int(meta[b'mtime_ns']) == stat.st_mtime_ns or meta[b'sha256'].decode() == file_sha256(path)):
+            books = pd.read_parquet(sidecar)
+            for column in json.loads(meta[b'json_columns']):
+                books[column] = books[column].map(json.loads).astype(object)
+            return books
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        pass
+
+    books = parse_books_yaml(str(path))
+    try:
+        # YAML gives some columns mixed types (year holds ints, strings and
+        # nulls); those are stored JSON-encoded so they round-trip exactly.
+        stored = books.copy()
+        json_columns = [c for c in stored.columns
+                        if stored[c].dtype == object and stored[c].map(type).nunique() > 1]
+        for column in json_columns:
+            stored[column] = stored[column].map(json.dumps)
+        table = pa.Table.from_pandas(stored, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'mtime_ns': str(stat.st_mtime_ns),
+            b'size': str(stat.st_size),
+            b'sha256': file_sha256(path),
+            b'json_columns': json.dumps(json_columns),
+        })
+        with atomic_path(sidecar) as tmp:
+            pq.write_table(table, tmp)
+    except (OSError, pa.ArrowException):
+        # Read-only folder or a column Arrow cannot type: just skip the cache.
+        pass
+    return books
+
+
+def clean_price(price_str):
+    if pd.isna(price_str) or price_str == '':
+        return 0.0
+    price_str = str(price_str).strip()
+    is_euro = '€' in price_str
+    nums = re.findall(r'\d+', price_str)
+    if not nums:
+        return 0.0
+    if len(nums) == 1:
+        val = float(nums[0])
+    else:
+        val = float(f"{nums[0]}.{nums[1]}")
+    if is_euro:
+        val = val * 1.2
+    return val
+
+
+def clean_prices(price_series):
+    # Vectorized clean_price: each distinct price string is parsed once with
+    # pandas string kernels and the results are broadcast back by code.
+    codes, uniques = pd.factorize(price_series)
+    values = pd.Series(uniques, dtype=object).astype(str)
+    values = values[values != ''].str.strip()
+
+    nums = values.str.extract(r'^\D*(\d+)(?:\D+(\d+))?')
+    whole = nums[0]
+    joined = whole.where(nums[1].isna(), whole + '.' + nums[1])
+    # float() like clean_price: it also reads non-ASCII digits such as '٣٤'.
+    parsed = joined.map(float, na_action='ignore').fillna(0.0).to_numpy(dtype=float)
+    parsed = np.where(values.str.contains('€', regex=False).to_numpy(), parsed * 1.2, parsed)
+
+    lookup = np.zeros(len(uniques) + 1)
+    lookup[values.index.to_numpy()] = parsed
+    # factorize codes missing values as -1, which lands on the trailing 0.0.
+    return pd.Series(lookup[codes], index=price_series.index, name=price_series.name)
+
+
+def parse_custom_dates(timestamp_series):
+    s = timestamp_series.astype(str)
+    s = s.str.replace(';', ' ', regex=False)
+    s = s.str.replace(',', ' ', regex=False)
+    return pd.to_datetime(s, format='mixed', dayfirst=False, errors='coerce')
+
+
+# Timestamp layouts: every digit replaced by 0 and every letter by a, so
+# "07/06/25 09:26:47 PM" has the layout "00/00/00 00:00:00 aa".
+TIME_LAYOUT = re.compile(r'0{1,2}:00(?::00)?(?:\.0+)?')
+ISO_LAYOUT = re.compile(r'0000-00-00a(0{1,2}:00(?::00)?(?:\.0+)?)')
+MONTH_NAME_LAYOUT = re.compile(r'0{1,2}-(a{3,})-0000')
+NUMERIC_DATE_LAYOUTS = [
+    (re.compile(r'0000([-/.])00(?:\1)00'), ['%Y{0}%m{0}%d']),
+    (re.compile(r'0{1,2}([-/.])0{1,2}(?:\1)0000'), ['%m{0}%d{0}%Y', '%d{0}%m{0}%Y']),
+    (re.compile(r'0{1,2}([-/.])0{1,2}(?:\1)00'), ['%m{0}%d{0}%y']),
+]
+CTIME_LAYOUT = re.compile(r'aaa aaa 0{1,2} 00:00:00 0000')
+
+
+def time_format(token, hour):
+    fmt = hour + (':%M:%S' if token.count(':') == 2 else ':%M')
+    return fmt + ('.%f' if '.' in token else '')
+
+
+def date_formats(token):
+    match = MONTH_NAME_LAYOUT.fullmatch(token)
+    if match:
+        return ['%d-%b-%Y' if len(match.group(1)) == 3 else '%d-%B-%Y']
+    for pattern, formats in NUMERIC_DATE_LAYOUTS:
+        match = pattern.fullmatch(token)
+        if match:
+            return [fmt.format(match.group(1)) for fmt in formats]
+    return []
+
+
+def layout_formats(layout):
+    # Explicit formats that read a layout the same way the mixed parser does:
+    # month before day, falling back to day-first only when that fails.
+    # Unrecognized layouts get no formats and are left to the mixed parser.
+    if CTIME_LAYOUT.fullmatch(layout):
+        return ['%a %b %d %H:%M:%S %Y']
+    tokens = layout.split(' ')
+    hour = '%I' if 'aa' in tokens else '%H'
+    pieces, dates, times = [], None, 0
+    for token in tokens:
+        iso = ISO_LAYOUT.fullmatch(token)
+        if token == 'aa':
+            pieces.append('%p')
+        elif TIME_LAYOUT.fullmatch(token):
+            pieces.append(time_format(token, hour))
+            times += 1
+        elif iso and dates is None:
+            pieces.append('%Y-%m-%dT' + time_format(iso.group(1), hour))
+            dates, times = [''], times + 1
+        elif dates is None and date_formats(token):
+            pieces.append('{date}')
+            dates = date_formats(token)
+        else:
+            return []
+    if dates is None or times != 1 or tokens.count('aa') > 1:
+        return []
+    template = ' '.join(pieces)
+    return [template.replace('{date}', date) for date in dates]
+
+
+def parse_dates_by_layout(timestamp_series):
+    # Same result as parse_custom_dates, but each distinct layout is parsed
+    # with an explicit format; only rows no format accepts take the slow
+    # per-element mixed path.
+    s = timestamp_series.astype(str)
+    s = s.str.replace(';', ' ', regex=False)
+    s = s.str.replace(',', ' ', regex=False)
+    s = s.reset_index(drop=True)
+
+    normalized = s.str.strip().str.replace(r'\s+', ' ', regex=True)
+    layouts = normalized.str.replace(r'\d', '0', regex=True).str.replace(r'[A-Za-z]', 'a', regex=True)
+
+    parts = []
+    leftover = np.ones(len(s), dtype=bool)
+    for layout, positions in layouts.groupby(layouts, sort=False).indices.items():
+        for fmt in layout_formats(layout):
+            parsed = pd.to_datetime(normalized.iloc[positions], format=fmt, errors='coerce')
+            ok = parsed.notna().to_numpy()
+            if '%y' in fmt:
+                # strptime and dateutil disagree on the century outside this window.
+                ok = ok & parsed.dt.year.between(2000, 2068).to_numpy()
+            parts.append(parsed[ok])
+            leftover[positions[ok]] = False
+            positions = positions[~ok]
+            if not len(positions):
+                break
+
+    parts.append(pd.to_datetime(s[leftover], format='mixed', dayfirst=False, errors='coerce'))
+    result = pd.concat(parts).sort_index()
+    result.index = timestamp_series.index
+    return result
+
+
+def resolve_users(users_df):
+    with stage("graph", rows=len(users_df)):
+        G = _identity_graph(users_df)
+
+    with stage("components", rows=len(users_df)):
+        return _graph_components(G)
+
+
+def _identity_graph(users_df):
+    G = nx.Graph()
+    for uid in users_df['id']:
+        G.add_node(uid)
+
+    email_map, phone_map, address_map = {}, {}, {}
+
+    for _, row in users_df.iterrows():
+        uid = row['id']
+
+        if pd.notna(row['email']) and str(row['email']).strip() != "":
+            email = str(row['email']).lower().strip()
+            if email in email_map:
+                G.add_edge(uid, email_map[email])
+            email_map[email] = uid
+
+        if pd.notna(row['phone']) and str(row['phone']).strip() != "":
+            phone = re.sub(r'\D', '', str(row['phone']))
+            if phone:
+                if phone in phone_map:
+                    G.add_edge(uid, phone_map[phone])
+                phone_map[phone] = uid
+
+        if pd.notna(row['address']) and str(row['address']).strip() != "":
+            addr = str(row['address']).strip().lower()
+            if addr in address_map:
+                G.add_edge(uid, address_map[addr])
+            address_map[addr] = uid
+
+    return G
+
+
+def _graph_components(G):
+    mapping = {}
+    grouped_ids = {}
+    for component in nx.connected_components(G):
+        component = list(component)
+        canonical_id = component[0]
+        grouped_ids[canonical_id] = sorted(component)
+        for uid in component:
+            mapping[uid] = canonical_id
+
+    return mapping, grouped_ids
+
+
+def identity_keys(users_df):
+    # Same normalization as resolve_users: lowercase email, digits-only phone
+    # and lowercase address, with blank values dropped.
+    keys = []
+    for column in ['email', 'phone', 'address']:
+        raw = users_df[column]
+        text = raw.astype(str)
+        text = text[raw.notna() & (text.str.strip() != '')]
+        if column == 'phone':
+            key = text.str.replace(r'\D', '', regex=True)
+            key = key[key != '']
+        else:
+            key = text.str.strip().str.lower()
+        keys.append(key)
+    return keys
+
+
+def connected_labels(n, left, right):
+    # Array-backed union-find: every edge hooks the larger root under the
+    # smaller one, then pointer jumping compresses paths until each node
+    # points straight at its root, which is the smallest node in its set.
+    parent = np.arange(n)
+    while True:
+        root_left, root_right = parent[left], parent[right]
+        pending = root_left != root_right
+        if not pending.any():
+            return parent
+        low = np.minimum(root_left[pending], root_right[pending])
+        high = np.maximum(root_left[pending], root_right[pending])
+        np.minimum.at(parent, high, low)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def resolve_users_union_find(users_df):
+    # Nodes are numbered in id order, so each cluster's root is its smallest id.
+    users_df = users_df.reset_index(drop=True)
+    node_of_row, ids = pd.factorize(users_df['id'], sort=True)
+    ids = np.asarray(ids)
+
+    with stage("keys", rows=len(users_df)) as record:
+        left, right = [], []
+        for key in identity_keys(users_df):
+            rows = key.index.to_numpy()
+            codes, _ = pd.factorize(key)
+            _, first = np.unique(codes, return_index=True)
+            nodes = node_of_row[rows]
+            left.append(nodes)
+            right.append(nodes[first[codes]])
+        left, right = np.concatenate(left), np.concatenate(right)
+        record['rows'] = len(left)
+
+    with stage("union_find", rows=len(ids)):
+        labels = connected_labels(len(ids), left, right)
+
+    with stage("groups", rows=len(ids)):
+        canonical = ids[labels]
+        mapping = dict(zip(ids.tolist(), canonical.tolist()))
+
+        order = np.argsort(labels, kind='stable')
+        members = ids[order].tolist()
+        starts = np.flatnonzero(np.diff(labels[order], prepend=-1)).tolist()
+        grouped_ids = {members[a]: members[a:b] for a, b in zip(starts, starts[1:] + [len(members)])}
+
+    return mapping, grouped_ids
+
+
+def prepare_orders(orders):
+    with stage("dates", rows=len(orders)):
+        orders['date_obj'] = parse_dates_by_layout(orders['timestamp'])
+    with stage("prices", rows=len(orders)):
+        orders['paid_price'] = orders['quantity'] * clean_prices(orders['unit_price'])
+    return orders
+
+
+def load_and_process_data(folder_path, resolve=resolve_users_union_find, metrics=None):
+    folder_path = Path(folder_path)
+
+    with stage("read_books") as record:
+        books = project_books(load_books(folder_path / "books.yaml"))
+        record['rows'] = len(books)
+    with stage("read_orders") as record:
+        orders = read_orders(folder_path / "orders.parquet")
+        record['rows'] = len(orders)
+    with stage("read_users") as record:
+        users = read_users(folder_path / "users.csv")
+        record['rows'] = len(users)
+
+    if orders.empty:
+        return None
+
+    prepare_orders(orders)
+    with stage("aggregate", rows=len(orders)):
+        aggregates = OrderAggregates.from_orders(orders)
+    with stage("resolve_users", rows=len(users)):
+        user_map, grouped_ids = resolve(users)
+    with stage("metrics"):
+        return compute_metrics(MetricContext(aggregates, books, user_map, grouped_ids), metrics)
+
+
+# Rows per batch in streaming mode; memory for the orders themselves is bounded
+# by this instead of the file size.
+STREAM_BATCH_SIZE = 250_000
+
+
+def aggregate_batches(batches, aggregates=None):
+    # Folds batches of orders into OrderAggregates (added to `aggregates` if
+    # given). Partials merge like a binary counter: two of the same level
+    # combine into one of the next, so each key is regrouped about log2(batches)
+    # times rather than once per batch, and about as many partials are pending.
+    pending = [] if aggregates is None else [(float('inf'), aggregates)]
+    for batch in batches:
+        with stage("batch", rows=len(batch)):
+            partial, level = OrderAggregates.from_orders(prepare_orders(batch)), 0
+            while pending and pending[-1][0] == level:
+                partial, level = OrderAggregates.combine([pending.pop()[1], partial]), level + 1
+            pending.append((level, partial))
+    if len(pending) > 1:
+        with stage("combine", rows=len(pending)):
+            return OrderAggregates.combine([part for _, part in pending])
+    return pending[0][1] if pending else None
+
+
+def metrics_from_aggregates(folder_path, aggregates, resolve=resolve_users_union_find, metrics=None):
+    # The rest of the pipeline once the orders are aggregated: users, books
+    # and the metrics themselves.
+    folder_path = Path(folder_path)
+    if aggregates is None or aggregates.total_orders == 0:
+        return None
+
+    with stage("read_books") as record:
+        books = project_books(load_books(folder_path / "books.yaml"))
+        record['rows'] = len(books)
+    with stage("read_users") as record:
+        users = read_users(folder_path / "users.csv")
+        record['rows'] = len(users)
+    with stage("resolve_users", rows=len(users)):
+        user_map, grouped_ids = resolve(users)
+    with stage("metrics"):
+        return compute_metrics(MetricContext(aggregates, books, user_map, grouped_ids), metrics)
+
+
+def stream_and_process_data(folder_path, resolve=resolve_users_union_find, metrics=None,
+                            batch_size=STREAM_BATCH_SIZE):
+    # Out-of-core variant of load_and_process_data for orders.parquet files
+    # that do not fit in memory. Each batch is reduced to OrderAggregates, so
+    # what is kept between batches is one entry per distinct timestamp, user
+    # and book. daily_revenue_df is per timestamp, and timestamps are nearly
+    # unique, so that is still close to one (small) entry per order.
+    folder_path = Path(folder_path)
+    aggregates = aggregate_batches(iter_orders(folder_path / "orders.parquet", batch_size))
+    return metrics_from_aggregates(folder_path, aggregates, resolve, metrics)
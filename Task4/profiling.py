@@ -0,0 +1,92 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# One JSON line per profiled load. Set TASK4_PROFILE_LOG to move it, or to an
+# empty string to only emit through the "profiling" logger.
+LOG_PATH = os.environ.get("TASK4_PROFILE_LOG", str(Path(__file__).parent / ".cache" / "profile.jsonl"))
+
+logger = logging.getLogger(__name__)
+_current = contextvars.ContextVar("profile", default=None)
+
+
+def rss_mb():
+    # Resident memory of this process; None without psutil.
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+class Profile:
+    def __init__(self, label, **context):
+        self.label = label
+        self.context = context
+        self.stages = []
+        self.total_seconds = None
+        self._stack = []
+
+    def to_dict(self):
+        return {"label": self.label, **self.context, "total_seconds": self.total_seconds, "stages": self.stages}
+
+
+@contextmanager
+def profile(label, **context):
+    # Collects every stage() run inside the block (in this thread) and logs
+    # the result when it exits, even if the block raised.
+    current = Profile(label, **context)
+    token = _current.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.total_seconds = time.perf_counter() - start
+        _current.reset(token)
+        write_log(current)
+
+
+@contextmanager
+def stage(name, rows=None):
+    # Times a block inside the active profile(); a no-op outside one. The
+    # yielded record can be updated, e.g. record['rows'] = len(result).
+    # Nested stages are named parent/child.
+    current = _current.get()
+    record = {"stage": name, "rows": rows}
+    if current is None:
+        yield record
+        return
+
+    current._stack.append(name)
+    record["stage"] = "/".join(current._stack)
+    # Appended on entry so stages list in start order, parents first.
+    current.stages.append(record)
+    memory_before = rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        memory_after = rss_mb()
+        record["memory_mb"] = None if memory_before is None else memory_after - memory_before
+        current._stack.pop()
+
+
+def write_log(current):
+    line = json.dumps({"event": "profile", "time": time.time(), **current.to_dict()}, default=str)
+    logger.info(line)
+    if not LOG_PATH:
+        return
+    try:
+        Path(LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+        with open(LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
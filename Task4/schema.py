@@ -0,0 +1,57 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Only the columns the metrics read. Everything else (orders.id, shipping,
+# users.name, book titles, ...) is never loaded.
+ORDER_COLUMNS = ['user_id', 'book_id', 'quantity', 'unit_price', 'timestamp']
+USER_COLUMNS = ['id', 'address', 'phone', 'email']
+BOOK_COLUMNS = ['id', 'author']
+
+# unit_price repeats heavily ("$12.50", "15€50", ...) so it is read straight
+# into a dictionary-encoded categorical. Timestamps are nearly all distinct
+# and stay Arrow strings.
+ORDER_CATEGORIES = ['unit_price']
+INTEGER_COLUMNS = {
+    'orders': ['user_id', 'book_id', 'quantity'],
+    'users': ['id'],
+    'books': ['id'],
+}
+
+
+def narrow_ints(df, columns):
+    # Smallest signed integer type that holds each column's actual range.
+    # Columns that are not integer (e.g. ids with gaps read from CSV as
+    # floats) are left alone.
+    for column in columns:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+    return df
+
+
+def read_orders(path):
+    table = pq.read_table(path, columns=ORDER_COLUMNS, read_dictionary=ORDER_CATEGORIES)
+    return narrow_ints(table.to_pandas(), INTEGER_COLUMNS['orders'])
+
+
+def iter_orders(path, batch_size, row_groups=None):
+    # Same columns and dtypes as read_orders, one record batch at a time,
+    # optionally from only some of the file's row groups.
+    parquet = pq.ParquetFile(path, read_dictionary=ORDER_CATEGORIES)
+    for batch in parquet.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=ORDER_COLUMNS):
+        yield narrow_ints(batch.to_pandas(), INTEGER_COLUMNS['orders'])
+
+
+def read_users(path):
+    users = pd.read_csv(path, usecols=USER_COLUMNS,
+                        dtype={'address': 'str', 'phone': 'str', 'email': 'str'})
+    return narrow_ints(users, INTEGER_COLUMNS['users'])
+
+
+def project_books(books):
+    books = books.reindex(columns=BOOK_COLUMNS)
+    books['author'] = books['author'].astype('category')
+    return narrow_ints(books, INTEGER_COLUMNS['books'])
+
+
+def memory_usage(df):
+    return int(df.memory_usage(deep=True).sum())
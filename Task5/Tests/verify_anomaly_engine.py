@@ -0,0 +1,72 @@
+import itertools
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from anomaly_engine import GRUBBS, IQR, MOVING_AVG, ZSCORE, AnomalyStats
+
+
+# The per-column detectors AnomalyStats replaced, as they were in alien.py
+# (fillna(method='bfill') is .bfill() in pandas 3).
+def detect_outliers_iqr(data, factor=1.5):
+    Q1, Q3 = np.percentile(data, 25), np.percentile(data, 75)
+    IQR = Q3 - Q1
+    return (data < (Q1 - factor * IQR)) | (data > (Q3 + factor * IQR))
+
+
+def detect_outliers_zscore(data, threshold=3):
+    return np.abs(stats.zscore(data)) > threshold
+
+
+def detect_outliers_moving_avg(data, window=7, threshold_percent=20):
+    ma = data.rolling(window=window).mean().bfill()
+    return (np.abs(data - ma) / ma.replace(0, 1) * 100) > threshold_percent
+
+
+def detect_outliers_grubbs(data, alpha=0.05):
+    n, std = len(data), np.std(data)
+    if std == 0: return np.zeros(n, dtype=bool)
+    g_crit = ((n - 1) * np.sqrt(np.square(stats.t.ppf(1 - alpha / (2 * n), n - 2)))) / (
+                np.sqrt(n) * np.sqrt(n - 2 + np.square(stats.t.ppf(1 - alpha / (2 * n), n - 2))))
+    return (np.abs(data - np.mean(data)) / std) > g_crit
+
+
+rng = np.random.default_rng(22)
+days = 365
+df = pd.DataFrame({
+    'Date': pd.date_range('2024-01-01', periods=days),
+    'LV_426': rng.normal(100, 15, days),
+    'Origae_6': rng.gamma(2, 30, days),
+    'Fiorina_151': rng.integers(0, 5, days),  # integers, with zero moving averages
+    'Constant': np.full(days, 42.0),
+})
+df.loc[[30, 200, 201], 'LV_426'] = [400, -50, 380]
+df.loc[100:106, 'Fiorina_151'] = 0
+columns = ['LV_426', 'Origae_6', 'Fiorina_151', 'Constant']
+
+print("--- PARITY: AnomalyStats masks vs the original detectors ---")
+# scipy warns about the constant column's zero variance; the result is NaN.
+warnings.simplefilter("ignore", RuntimeWarning)
+engine = AnomalyStats(df, columns)
+grid = list(itertools.product([0.5, 1.5, 3.0], [1.0, 2.0, 3.0], [5.0, 20.0, 50.0]))
+for iqr_factor, z_threshold, ma_threshold in grid:
+    masks = engine.masks(iqr_factor, z_threshold, ma_threshold)
+    for column in columns:
+        data = df[column]
+        expected = {
+            IQR: detect_outliers_iqr(data, iqr_factor),
+            ZSCORE: detect_outliers_zscore(data, z_threshold),
+            MOVING_AVG: detect_outliers_moving_avg(data, 7, ma_threshold),
+            GRUBBS: detect_outliers_grubbs(data),
+        }
+        for bit, flags in expected.items():
+            actual = (masks[column] & bit) > 0
+            assert np.array_equal(actual.to_numpy(), np.asarray(flags)), (column, bit, iqr_factor, z_threshold, ma_threshold)
+
+assert not engine.evaluate(0.5, 1.0, 5.0)[:, columns.index('Constant')].any()
+print(f"{len(grid)} threshold sets x {len(columns)} columns: every method's flags identical, constant column never flagged.")
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from online import MINE_COLUMNS, OnlineAnomalyDetector
+
+THRESHOLDS = (1.5, 3.0, 30.0)
+
+
+def replay(df, columns):
+    detector = OnlineAnomalyDetector(columns)
+    return detector.append(df, *THRESHOLDS).to_numpy()
+
+
+rng = np.random.default_rng(426)
+days = 300
+df = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=days)})
+for column in MINE_COLUMNS[:3]:
+    df[column] = rng.normal(100, 10, days)
+df.loc[[40, 120, 250], 'LV_426'] = [400, 5, 350]
+df['Total_Output'] = df[MINE_COLUMNS[:3]].sum(axis=1)
+clean = replay(df, MINE_COLUMNS)
+assert clean.any()
+
+print("--- MISSING VALUES IN THE STREAM ---")
+# Gaps in one mine, including the spike days and the very first days.
+gaps = df.copy()
+missing = np.r_[0:3, 40, 60:70, 250]
+gaps.loc[missing, 'LV_426'] = np.nan
+masks = replay(gaps, MINE_COLUMNS)
+j = MINE_COLUMNS.index('LV_426')
+assert not masks[missing, j].any()
+# The other mines do not notice the gaps...
+assert np.array_equal(np.delete(masks, j, axis=1), np.delete(clean, j, axis=1))
+# ...and the gappy mine scores its present days as if the gaps were never sent.
+present = np.setdiff1d(np.arange(days), missing)
+alone = replay(gaps.loc[present, ['Date', 'LV_426']], ['LV_426'])
+assert np.array_equal(masks[present, j], alone[:, 0])
+assert masks[120, j]
+print(f"{len(missing)} missing LV_426 days: none flagged, other mines unchanged, present days scored as without gaps.")
+
+# A mine with nothing but gaps so far is simply never flagged.
+empty = df.copy()
+empty['Origae_6'] = np.nan
+assert not replay(empty, MINE_COLUMNS)[:, MINE_COLUMNS.index('Origae_6')].any()
+print("An all-missing mine replays without error and is never flagged.")
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# One bit per detection method in the masks returned by AnomalyStats.evaluate.
+IQR, ZSCORE, MOVING_AVG, GRUBBS = 1, 2, 4, 8
+METHODS = {IQR: "IQR", ZSCORE: "Z-Score", MOVING_AVG: "MA", GRUBBS: "Grubbs"}
+
+# Mask value -> "IQR, Z-Score, ..." for every combination of the four bits.
+REASONS = [", ".join(name for bit, name in METHODS.items() if mask & bit) for mask in range(16)]
+
+
+def grubbs_critical(n, alpha=0.05):
+    # Two-sided Grubbs critical value; depends only on n and alpha.
+    t = stats.t.ppf(1 - alpha / (2 * n), n - 2)
+    return ((n - 1) * np.abs(t)) / (np.sqrt(n) * np.sqrt(n - 2 + np.square(t)))
+
+
+def flag_anomalies(values, q1, q3, z, ma_deviation, g_crit, iqr_factor=1.5, z_threshold=3, ma_threshold=20):
+    # Bitmask with the shape of `values`. The z-score, moving-average and
+    # Grubbs tests are a single broadcast comparison of stacked scores against
+    # stacked thresholds; IQR compares against its fences directly. Grubbs is
+    # scored as z / g_crit against 1, so g_crit may also be one per column.
+    iqr = q3 - q1
+    outside = (values < q1 - iqr_factor * iqr) | (values > q3 + iqr_factor * iqr)
+
+    expand = (slice(None),) + (None,) * np.ndim(values)
+    scores = np.stack(np.broadcast_arrays(z, ma_deviation, z / g_crit))
+    thresholds = np.array([z_threshold, ma_threshold, 1], dtype=float)[expand]
+    bits = np.array([ZSCORE, MOVING_AVG, GRUBBS], dtype=np.uint8)[expand]
+
+    return (outside * np.uint8(IQR)) | np.bitwise_or.reduce((scores > thresholds) * bits, axis=0)
+
+
+class AnomalyStats:
+    # Everything the detectors need that does not depend on a threshold,
+    # computed once for all columns as (rows, columns) arrays: quartiles,
+    # population mean/std, the distance from the mean in std units, and the
+    # deviation from the moving average in percent. evaluate() then only
+    # compares these against the thresholds.
+
+    def __init__(self, df, columns, window=7, alpha=0.05):
+        self.index = df.index
+        self.columns = list(columns)
+        frame = df[self.columns].astype(float)
+        self.values = frame.to_numpy()
+
+        self.q1, self.q3 = np.percentile(self.values, [25, 75], axis=0)
+        self.iqr = self.q3 - self.q1
+        self.mean = self.values.mean(axis=0)
+        self.std = self.values.std(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # A constant column gives NaN here, which no threshold flags.
+            self.z = np.abs(self.values - self.mean) / self.std
+
+        self.rolling_mean = frame.rolling(window=window).mean()
+        ma = self.rolling_mean.bfill().to_numpy()
+        self.ma_deviation = np.abs(self.values - ma) / np.where(ma == 0, 1, ma) * 100
+
+        n = len(frame)
+        self.grubbs_critical = grubbs_critical(n, alpha) if n > 2 else np.inf
+
+    def evaluate(self, iqr_factor=1.5, z_threshold=3, ma_threshold=20):
+        # Bitmask per (row, column).
+        return flag_anomalies(self.values, self.q1, self.q3, self.z, self.ma_deviation, self.grubbs_critical,
+                              iqr_factor, z_threshold, ma_threshold)
+
+    def masks(self, iqr_factor=1.5, z_threshold=3, ma_threshold=20):
+        return pd.DataFrame(self.evaluate(iqr_factor, z_threshold, ma_threshold),
+                            index=self.index, columns=self.columns)
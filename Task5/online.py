@@ -0,0 +1,235 @@
+import argparse
+import math
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from anomaly_engine import REASONS, AnomalyStats, flag_anomalies, grubbs_critical
+from sources import LocalSource, load
+
+MINE_COLUMNS = ['LV_426', 'Origae_6', 'Fiorina_151', 'Total_Output']
+
+
+class P2Quantile:
+    # Streaming estimate of one quantile with the P-square algorithm (Jain &
+    # Chlamtac, 1985): five markers whose heights are nudged towards the
+    # quantile as observations arrive. O(1) memory and time per update; the
+    # first five values are kept and answered exactly like np.percentile.
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        self.count += 1
+        q, n = self.heights, self.positions
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        if not self.heights:
+            return math.nan
+        if self.count <= 5:
+            return float(np.percentile(self.heights, self.p * 100))
+        return self.heights[2]
+
+
+class Welford:
+    # Running mean and population variance (ddof=0, like np.std) without
+    # keeping the history.
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else math.nan
+
+
+class MovingAverage:
+    # Mean of the last `window` values kept in a ring buffer. Until the window
+    # has filled it is the mean of what has arrived so far; the batch detector
+    # backfills those first days from the first full window instead, which a
+    # stream cannot see yet.
+
+    def __init__(self, window=7):
+        self.buffer = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, x):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.total -= self.buffer[0]
+        self.buffer.append(x)
+        self.total += x
+
+    @property
+    def value(self):
+        return self.total / len(self.buffer) if self.buffer else math.nan
+
+
+class OnlineAnomalyDetector:
+    # Incremental counterpart of AnomalyStats for a stream of days: each
+    # update() folds one observation per column into the sketches and scores
+    # only that day. IQR uses P-square estimates of the quartiles over the
+    # whole history, z-score and Grubbs use Welford's running mean/std, and
+    # the moving average uses the ring buffer. evaluate() applies thresholds
+    # to the last scored day, so changing them does not touch the sketches.
+    # Nothing is flagged during the first `warmup` days (one moving-average
+    # window by default), when a handful of points makes every test noisy.
+    # A missing (NaN) value leaves its column's sketches untouched and is
+    # never flagged; the other columns of that day are scored as usual.
+
+    def __init__(self, columns, window=7, alpha=0.05, warmup=None):
+        self.columns = list(columns)
+        self.alpha = alpha
+        self.warmup = window if warmup is None else warmup
+        self.q1 = [P2Quantile(0.25) for _ in self.columns]
+        self.q3 = [P2Quantile(0.75) for _ in self.columns]
+        self.moments = [Welford() for _ in self.columns]
+        self.averages = [MovingAverage(window) for _ in self.columns]
+        self.last_date = None
+        self.scores = None
+        self.count = 0
+
+    @property
+    def counts(self):
+        # Observations per column, which differ once some values were missing.
+        return np.array([m.count for m in self.moments])
+
+    def update(self, values, date=None):
+        values = np.asarray(values, dtype=float)
+        self.count += 1
+        for x, q1, q3, moments, average in zip(values, self.q1, self.q3, self.moments, self.averages):
+            if math.isnan(x):
+                continue
+            q1.update(x)
+            q3.update(x)
+            moments.update(x)
+            average.update(x)
+
+        mean = np.array([m.mean for m in self.moments])
+        std = np.array([m.std for m in self.moments])
+        ma = np.array([a.value for a in self.averages])
+        counts = self.counts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.abs(values - mean) / std
+            g_crit = np.where(counts > 2, grubbs_critical(np.maximum(counts, 3), self.alpha), np.inf)
+        self.scores = {
+            'values': values,
+            'q1': np.array([q.value for q in self.q1]),
+            'q3': np.array([q.value for q in self.q3]),
+            'z': z,
+            'ma_deviation': np.abs(values - ma) / np.where(ma == 0, 1, ma) * 100,
+            'g_crit': g_crit,
+        }
+        self.last_date = date
+        return self
+
+    def evaluate(self, iqr_factor=1.5, z_threshold=3, ma_threshold=20):
+        # Bitmask per column for the last day, same bits as AnomalyStats.
+        if self.scores is None:
+            return np.zeros(len(self.columns), dtype=np.uint8)
+        masks = flag_anomalies(**self.scores, iqr_factor=iqr_factor, z_threshold=z_threshold,
+                               ma_threshold=ma_threshold)
+        return np.where(self.counts < self.warmup, 0, masks).astype(np.uint8)
+
+    def append(self, df, iqr_factor=1.5, z_threshold=3, ma_threshold=20):
+        # Feeds the rows of `df` dated after the last day seen and returns
+        # their masks (rows x columns); earlier rows are skipped, not rescored.
+        df = df.sort_values('Date', kind='stable')
+        if self.last_date is not None:
+            df = df[df['Date'] > self.last_date]
+        masks = np.zeros((len(df), len(self.columns)), dtype=np.uint8)
+        for i, (date, values) in enumerate(zip(df['Date'], df[self.columns].to_numpy(dtype=float))):
+            masks[i] = self.update(values, date).evaluate(iqr_factor, z_threshold, ma_threshold)
+        return pd.DataFrame(masks, index=df.index, columns=self.columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay mine output data as a stream and flag each day as it arrives.")
+    parser.add_argument("path", help="CSV/Parquet file (or folder of them) with a Date column and one column per mine")
+    parser.add_argument("--iqr-factor", type=float, default=1.5)
+    parser.add_argument("--z-threshold", type=float, default=3.0)
+    parser.add_argument("--ma-threshold", type=float, default=30.0)
+    parser.add_argument("--warmup", type=int, default=7, help="days to observe before flagging anything")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    df = load(LocalSource(args.path))
+    columns = [c for c in MINE_COLUMNS if c in df.columns]
+    if not columns:
+        print(f"No mine columns ({', '.join(MINE_COLUMNS)}) in {args.path}")
+        return 1
+    thresholds = (args.iqr_factor, args.z_threshold, args.ma_threshold)
+
+    detector = OnlineAnomalyDetector(columns, warmup=args.warmup)
+    online = np.zeros((len(df), len(columns)), dtype=np.uint8)
+    start = time.perf_counter()
+    for i, (date, values) in enumerate(zip(df['Date'], df[columns].to_numpy(dtype=float))):
+        online[i] = detector.update(values, date).evaluate(*thresholds)
+        if not args.quiet:
+            for column, value, mask in zip(columns, values, online[i]):
+                if mask:
+                    print(f"{date:%Y-%m-%d}  {column:<12} {value:>10.2f}  {REASONS[mask]}")
+    seconds = time.perf_counter() - start
+
+    # The batch engine over the full file, for comparison: it sees the whole
+    # history for every day, the stream only the days before it.
+    batch = AnomalyStats(df, columns).evaluate(*thresholds)
+    print(f"\n{len(df)} days replayed in {seconds:.3f}s ({seconds / max(len(df), 1) * 1e6:.0f} us/day)")
+    print(f"{'Mine':<12} | {'Online':>6} | {'Batch':>6} | {'Both':>6}")
+    print("-" * 39)
+    for j, column in enumerate(columns):
+        flagged_online, flagged_batch = online[:, j] > 0, batch[:, j] > 0
+        print(f"{column:<12} | {flagged_online.sum():>6} | {flagged_batch.sum():>6} | "
+              f"{(flagged_online & flagged_batch).sum():>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
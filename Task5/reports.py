@@ -0,0 +1,271 @@
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+from matplotlib.figure import Figure
+
+from anomaly_engine import REASONS, AnomalyStats
+from sources import CACHE_DIR, SHEET_URL, LocalSource, SheetSource, atomic_path, load
+
+# Finished PDFs, one file per report key. Reports not used for
+# MINES_REPORT_MAX_AGE_DAYS are dropped, and beyond MINES_REPORT_MAX_FILES the
+# least recently used ones go first.
+REPORT_DIR = CACHE_DIR / "reports"
+REPORT_MAX_FILES = int(os.environ.get("MINES_REPORT_MAX_FILES", 200))
+REPORT_MAX_AGE = float(os.environ.get("MINES_REPORT_MAX_AGE_DAYS", 30)) * 86400
+# Background renders for the dashboard. Charts are drawn on a bare Figure
+# (no pyplot state), so renders in different threads do not interfere.
+REPORT_WORKERS = int(os.environ.get("MINES_REPORT_WORKERS", min(4, os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+_pending = {}
+_lock = threading.Lock()
+
+
+def create_static_chart(df, col_name, anomalies, chart_type, poly_degree):
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    x_nums = np.arange(len(df))
+
+    # Main Data
+    if chart_type == "Bar":
+        ax.bar(df['Date'], df[col_name], color='green', alpha=0.7, label='Output')
+    elif chart_type == "Area":
+        ax.fill_between(df['Date'], df[col_name], color='green', alpha=0.3)
+        ax.plot(df['Date'], df[col_name], color='green', label='Output')
+    else:
+        ax.plot(df['Date'], df[col_name], color='green', label='Output')
+
+    ma_7 = df[col_name].rolling(window=7).mean()
+    ax.plot(df['Date'], ma_7, color='magenta', linewidth=2, label='Moving Avg (7-Day)')
+
+    if len(df) > poly_degree:
+        z = np.polyfit(x_nums, df[col_name], poly_degree)
+        p = np.poly1d(z)
+        ax.plot(df['Date'], p(x_nums), color='blue', linestyle='--', linewidth=1.5, label=f'Trend (Deg {poly_degree})')
+
+    if not anomalies.empty:
+        ax.scatter(anomalies['Date'], anomalies[col_name], color='red', marker='x', s=50, label='Anomaly', zorder=5)
+
+    ax.set_title(f"Production Timeline: {col_name}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
+    temp_file.close()
+    fig.savefig(temp_file.name, format='png', dpi=100)
+    return temp_file.name
+
+
+class PDFReport(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 16)
+        self.cell(0, 10, 'Weyland-Yutani Mining Operations Report', 0, 1, 'C')
+        self.ln(5)
+
+    def chapter_title(self, title):
+        self.set_font('Arial', 'B', 12)
+        self.set_fill_color(220, 220, 220)
+        self.cell(0, 8, title, 0, 1, 'L', 1)
+        self.ln(4)
+
+    def chapter_body(self, text):
+        self.set_font('Arial', '', 10)
+        self.multi_cell(0, 6, text)
+        self.ln()
+
+    def create_table(self, header, data):
+        self.set_font('Arial', 'B', 10)
+        self.set_fill_color(240, 240, 240)
+        w = [40, 30, 120]
+        for i, h in enumerate(header):
+            self.cell(w[i], 8, h, 1, 0, 'C', 1)
+        self.ln()
+        self.set_font('Arial', '', 9)
+        for row in data:
+            self.cell(w[0], 7, str(row[0]), 1, 0, 'C')
+            self.cell(w[1], 7, str(row[1]), 1, 0, 'R')
+            self.cell(w[2], 7, str(row[2]), 1, 0, 'L')
+            self.ln()
+
+
+def generate_pdf(df, target_col, stats_dict, anomalies_data, chart_path):
+    pdf = PDFReport()
+    pdf.add_page()
+
+    pdf.chapter_title(f"1. Operational Statistics ({target_col})")
+    text = f"""
+    Mean Daily Output: {stats_dict['mean']:.2f}
+    Standard Deviation: {stats_dict['std']:.2f}
+    Median Output: {stats_dict['median']:.2f}
+    Interquartile Range: {stats_dict['iqr']:.2f}
+    Total Days Recorded: {stats_dict['count']}"""
+    pdf.chapter_body(text)
+
+    pdf.chapter_title("2. Visual Analysis")
+    pdf.image(chart_path, x=10, w=190)
+    pdf.ln(5)
+
+    pdf.add_page()
+    pdf.chapter_title("3. Detected Anomalies Log")
+    if anomalies_data:
+        pdf.create_table(["Date", "Value", "Detection Method"], anomalies_data)
+    else:
+        pdf.chapter_body("No anomalies detected.")
+
+    try:
+        return bytes(pdf.output(dest='S').encode('latin-1', 'replace'))
+    except:
+        return bytes(pdf.output())
+
+
+def anomaly_table(df, column, mask):
+    # Rows of the anomalies log straight from the detector mask: the flagged
+    # rows are selected once and the reason text is a lookup by mask value.
+    mask = np.asarray(mask)
+    flagged = mask > 0
+    dates = df['Date'].to_numpy()[flagged]
+    values = df[column].to_numpy(dtype=float)[flagged]
+    reasons = np.array(REASONS, dtype=object)[mask[flagged]]
+    return list(zip(pd.DatetimeIndex(dates).strftime('%Y-%m-%d'), np.char.mod('%.2f', values), reasons))
+
+
+def report_key(df, column, thresholds, chart_type, poly_degree):
+    # Same data for the column, same thresholds and chart settings -> same PDF.
+    data = pd.util.hash_pandas_object(df[['Date', column]], index=False).to_numpy()
+    digest = hashlib.sha256(data.tobytes())
+    digest.update(repr((column, tuple(float(t) for t in thresholds), chart_type, int(poly_degree))).encode())
+    return digest.hexdigest()[:32]
+
+
+def render_report(df, column, thresholds, chart_type, poly_degree):
+    stats = AnomalyStats(df, [column])
+    mask = stats.evaluate(*thresholds)[:, 0]
+    data = df[column]
+    stats_data = {
+        'mean': data.mean(), 'std': data.std(), 'median': data.median(),
+        'iqr': stats.iqr[0], 'count': len(data)
+    }
+
+    chart_path = create_static_chart(df, column, df[mask > 0], chart_type, poly_degree)
+    try:
+        return generate_pdf(df, column, stats_data, anomaly_table(df, column, mask), chart_path)
+    finally:
+        if os.path.exists(chart_path): os.remove(chart_path)
+
+
+def read_cached(path):
+    # Cached PDF bytes or None; a hit bumps the mtime, which is the "last
+    # used" time prune_reports goes by.
+    try:
+        pdf_bytes = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return pdf_bytes
+
+
+def prune_reports():
+    now = time.time()
+    cached = []
+    for path in REPORT_DIR.glob("*.pdf"):
+        try:
+            cached.append((path.stat().st_mtime, path))
+        except OSError:
+            pass
+    cached.sort(reverse=True)
+    for i, (mtime, path) in enumerate(cached):
+        if i >= REPORT_MAX_FILES or now - mtime > REPORT_MAX_AGE:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def get_report(df, column, thresholds, chart_type, poly_degree):
+    # PDF bytes for the report, rendered only if no identical one is on disk.
+    path = REPORT_DIR / f"{report_key(df, column, thresholds, chart_type, poly_degree)}.pdf"
+    pdf_bytes = read_cached(path)
+    if pdf_bytes is not None:
+        return pdf_bytes
+
+    pdf_bytes = render_report(df, column, thresholds, chart_type, poly_degree)
+    try:
+        with atomic_path(path) as tmp:
+            tmp.write_bytes(pdf_bytes)
+        prune_reports()
+    except OSError:
+        pass
+    return pdf_bytes
+
+
+def submit_report(df, column, thresholds, chart_type, poly_degree):
+    # Future with the PDF bytes, rendered on the background pool. A cached
+    # report comes back as an already finished future, and asking again for
+    # a report that is still rendering returns the same future.
+    key = report_key(df, column, thresholds, chart_type, poly_degree)
+    pdf_bytes = read_cached(REPORT_DIR / f"{key}.pdf")
+    if pdf_bytes is not None:
+        future = Future()
+        future.set_result(pdf_bytes)
+        return future
+
+    with _lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _pending[key] = _executor.submit(get_report, df, column, thresholds, chart_type, poly_degree)
+            future.add_done_callback(lambda _: _pending.pop(key, None))
+    return future
+
+
+def submit_all(df, columns, thresholds, chart_type, poly_degree):
+    return {column: submit_report(df, column, thresholds, chart_type, poly_degree) for column in columns}
+
+
+def _batch_report(df, column, thresholds, chart_type, poly_degree, out_dir):
+    # Runs in a worker process; only the written path goes back.
+    path = Path(out_dir) / f"mining_report_{column}.pdf"
+    path.write_bytes(get_report(df, column, thresholds, chart_type, poly_degree))
+    return column, path
+
+
+def build_all(df, columns, thresholds, chart_type, poly_degree, out_dir, workers=None):
+    # Batch mode: one report per mine, rendered in parallel processes.
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or min(len(columns), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(_batch_report, df, column, thresholds, chart_type, poly_degree, out_dir)
+                   for column in columns]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+if __name__ == "__main__":
+    from online import MINE_COLUMNS
+
+    parser = argparse.ArgumentParser(description="Write a PDF report for every mine.")
+    parser.add_argument("path", nargs="?", help="CSV/Parquet file or folder (default: the Google Sheet)")
+    parser.add_argument("--out", default="reports", type=Path, help="output folder")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per mine, up to CPU count)")
+    parser.add_argument("--iqr-factor", type=float, default=1.5)
+    parser.add_argument("--z-threshold", type=float, default=3.0)
+    parser.add_argument("--ma-threshold", type=float, default=30.0)
+    parser.add_argument("--chart", default="Line", choices=["Line", "Bar", "Area"])
+    parser.add_argument("--degree", type=int, default=3, choices=[1, 2, 3, 4])
+    args = parser.parse_args()
+
+    df = load(LocalSource(args.path) if args.path else SheetSource(SHEET_URL))
+    columns = [c for c in MINE_COLUMNS if c in df.columns]
+    thresholds = (args.iqr_factor, args.z_threshold, args.ma_threshold)
+    for column, path in build_all(df, columns, thresholds, args.chart, args.degree, args.out, args.workers):
+        print(f"{column:<12} -> {path}")
@@ -0,0 +1,184 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Typed Parquet snapshots of every source, one file per source. Set
+# MINES_CACHE_DIR to move them.
+CACHE_DIR = Path(os.environ.get("MINES_CACHE_DIR", Path(__file__).parent / ".cache"))
+SNAPSHOT_VERSION = 1
+FILE_SUFFIXES = ('.csv', '.parquet')
+
+# The published Google Sheet the dashboard reads by default.
+SHEET_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vQceXReuRkxkGqRnEoGGPgaOhhHDQxzaBWRjd0cmdDr7Ffm_tLvBgcx-g84zgiUJBaG6oVCF8mgCLNw/pub?gid=0&single=true&output=csv"
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def atomic_path(path):
+    # A temporary file next to `path` to write to; it replaces `path` only if
+    # the block finishes, so readers never see a half-written file.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def parse_dates(df):
+    # Sheet exports give Excel day serials, hand-made CSVs ISO strings.
+    if pd.api.types.is_numeric_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'], unit='D', origin='1899-12-30')
+    elif not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'])
+    return df
+
+
+def read_frame(path):
+    path = Path(path)
+    return pd.read_parquet(path) if path.suffix == '.parquet' else pd.read_csv(path)
+
+
+class LocalSource:
+    # A CSV/Parquet file, or a directory whose CSV/Parquet files are stacked
+    # (e.g. one export per month). Freshness is decided from file stats only.
+    kind = "local"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.location = str(self.path.resolve())
+
+    def files(self):
+        if self.path.is_dir():
+            return sorted(p for p in self.path.iterdir() if p.suffix in FILE_SUFFIXES)
+        return [self.path]
+
+    def fingerprint(self):
+        return [[p.name, p.stat().st_mtime_ns, p.stat().st_size] for p in self.files()]
+
+    def fetch(self, meta, force=False):
+        # None when the snapshot described by `meta` is still current.
+        fingerprint = self.fingerprint()
+        if not fingerprint:
+            raise FileNotFoundError(f"no {' or '.join(FILE_SUFFIXES)} files in {self.path}")
+        if meta and meta.get('fingerprint') == fingerprint:
+            return None
+        df = pd.concat([parse_dates(read_frame(p)) for p in self.files()], ignore_index=True)
+        return df, {'fingerprint': fingerprint}
+
+
+class SheetSource:
+    # A published Google Sheet CSV. The snapshot is used without any request
+    # for `max_age` seconds; after that (or with force) a conditional request
+    # is sent with the stored ETag/Last-Modified, and a 200 whose body hashes
+    # the same as the snapshot is not parsed again.
+    kind = "sheet"
+
+    def __init__(self, url, max_age=300, timeout=10):
+        self.url = url
+        self.location = url
+        self.max_age = max_age
+        self.timeout = timeout
+
+    def fetch(self, meta, force=False):
+        if meta and not force and time.time() - meta['checked'] < self.max_age:
+            return None
+
+        request = urllib.request.Request(self.url)
+        if meta and meta.get('etag'):
+            request.add_header('If-None-Match', meta['etag'])
+        if meta and meta.get('last_modified'):
+            request.add_header('If-Modified-Since', meta['last_modified'])
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and meta:
+                return None
+            raise
+
+        digest = hashlib.sha256(body).hexdigest()
+        if meta and meta.get('sha256') == digest:
+            return None
+        df = parse_dates(pd.read_csv(io.BytesIO(body)))
+        return df, {'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'), 'sha256': digest}
+
+
+def snapshot_path(source):
+    key = hashlib.sha1(source.location.encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{source.kind}-{key}.parquet"
+
+
+def read_meta(path):
+    # The snapshot's own metadata plus when the source was last checked
+    # (the snapshot's mtime, bumped whenever a check finds nothing new).
+    try:
+        meta = json.loads((pq.read_schema(path).metadata or {})[b'mines_snapshot'])
+        meta['checked'] = path.stat().st_mtime
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+    return meta if meta.get('version') == SNAPSHOT_VERSION else None
+
+
+def write_snapshot(path, df, meta):
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'mines_snapshot': json.dumps({**meta, 'version': SNAPSHOT_VERSION}),
+        })
+        with atomic_path(path) as tmp:
+            pq.write_table(table, tmp)
+    except (OSError, pa.ArrowException):
+        # Read-only checkout or a column Arrow cannot type: just skip the cache.
+        pass
+
+
+def load(source, force=False):
+    # Data for `source` with Date already parsed. df.attrs['status'] says
+    # where it came from: "fetched" (read and parsed), "snapshot" (unchanged
+    # since the last check) or "offline" (the source failed; last snapshot).
+    path = snapshot_path(source)
+    meta = read_meta(path)
+    try:
+        result = source.fetch(meta, force)
+    except (OSError, ValueError) as e:
+        if meta is None:
+            raise
+        logger.warning("%s unavailable (%s); using snapshot %s", source.location, e, path)
+        result, status = None, "offline"
+    else:
+        status = "snapshot"
+
+    if result is None:
+        df = pd.read_parquet(path)
+        if status == "snapshot":
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+    else:
+        df, meta = result
+        df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+        write_snapshot(path, df, meta)
+        status = "fetched"
+
+    df.attrs['status'] = status
+    df.attrs['checked'] = meta.get('checked') if status == "offline" else time.time()
+    return df